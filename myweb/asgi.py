@@ -2,6 +2,9 @@
 ASGI config for myweb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It defaults to the ASGI profile, myweb/settings_asgi.py, e.g.
+
+    uvicorn myweb.asgi:application --host 0.0.0.0 --port 8000 --workers 4 --no-access-log
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -11,6 +14,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myweb.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myweb.settings_asgi')
 
 application = get_asgi_application()
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'webapp.profiling.RequestProfilingMiddleware',  # Removed at startup unless REQUEST_PROFILING is on
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -131,6 +132,96 @@ STATIC_ROOT = os.path.join(BASE_DIR,'assets')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# A file cache is shared by the web server and the scraper commands, which bump and pre-warm section pages
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR,'page_cache'),
+    }
+}
+
+# Rendered section pages are keyed by section version, so this only bounds how long dead entries linger
+SECTION_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Request profiling: Server-Timing headers, sampled logging and a slow-request threshold (see webapp/profiling.py)
+REQUEST_PROFILING = False
+REQUEST_PROFILING_SAMPLE_RATE = 0.0
+REQUEST_PROFILING_SLOW_MS = 500
+
+# Serve the async versions of the list views and the API; on in the ASGI profile (myweb/settings_asgi.py)
+ASYNC_VIEWS = False
+
+# Section list pages: default and maximum number of articles per page
+ARTICLES_PER_PAGE = 24
+ARTICLES_MAX_PER_PAGE = 100
+
+# Site the scrapers crawl; section paths and relative article links are resolved against it
+CRAWLER_BASE_URL = 'https://www.bbc.com'
+
+# Where each scraper run writes its JSON report and Prometheus textfile (see webapp/crawler/metrics.py)
+CRAWLER_METRICS_JSON = None
+CRAWLER_METRICS_TEXTFILE = None
+
+# How the scrapers find articles, 'feeds' or 'anchors', and where (see Crawler in webapp/crawler/pipeline.py)
+CRAWLER_DISCOVERY = 'feeds'
+CRAWLER_FEEDS = {
+    'home': ['https://feeds.bbci.co.uk/news/rss.xml'],
+    'news': ['https://feeds.bbci.co.uk/news/rss.xml', 'https://feeds.bbci.co.uk/news/world/rss.xml'],
+    'sports': ['https://feeds.bbci.co.uk/sport/rss.xml'],
+    'business': ['https://feeds.bbci.co.uk/news/business/rss.xml'],
+    'innovations': ['https://feeds.bbci.co.uk/news/technology/rss.xml',
+                    'https://feeds.bbci.co.uk/news/science_and_environment/rss.xml'],
+    'travel': ['/sitemaps/https-index-com-news.xml'],
+}
+CRAWLER_SITE_HOSTS = ['www.bbc.com', 'bbc.com', 'www.bbc.co.uk', 'bbc.co.uk']
+# Child sitemaps read from a sitemap index, newest first as listed
+CRAWLER_SITEMAP_MAX_CHILDREN = 2
+
+# crawl_scheduler: seconds between each section's runs, their jitter and the most crawled at once
+CRAWLER_SCHEDULE = {
+    'home': 15 * 60,
+    'news': 15 * 60,
+    'sports': 20 * 60,
+    'business': 30 * 60,
+    'innovations': 60 * 60,
+    'travel': 60 * 60,
+}
+CRAWLER_SCHEDULE_JITTER = 0.1
+CRAWLER_SCHEDULE_MAX_CONCURRENT = 2
+
+# Scraper retries, backoff and per-host rate control (see fetch() and HostController in webapp/crawler)
+CRAWLER_RETRIES = 3
+CRAWLER_BACKOFF_BASE = 0.5
+CRAWLER_BACKOFF_MAX = 30
+CRAWLER_LATENCY_TOLERANCE = 3.0
+CRAWLER_BREAKER_WINDOW = 20
+CRAWLER_BREAKER_THRESHOLD = 0.5
+CRAWLER_BREAKER_COOLDOWN = 60
+
+# Scraper HTTP cache (ETag/Last-Modified validators of feeds and section pages, one file per URL)
+CRAWLER_CACHE_DIR = os.path.join(BASE_DIR,'crawl_cache')
+
+# Article page parser: 'html.parser' or 'lxml' (see webapp/crawler/extract.py)
+CRAWLER_HTML_PARSER = 'html.parser'
+
+# Near-duplicate stories: 'hide', 'skip' or 'keep', and the wording they share (see webapp/crawler/pipeline.py)
+CRAWLER_DUPLICATE_POLICY = 'hide'
+CRAWLER_DUPLICATE_SIMILARITY = 0.6
+
+# Article image thumbnails under MEDIA_ROOT/thumbs (see ThumbnailMaker in webapp/crawler/thumbnails.py)
+THUMBNAIL_WIDTHS = [320, 640]
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_MAX_BYTES = 10 * 2 ** 20
+THUMBNAIL_MIN_SIZE = 64
+THUMBNAIL_MAX_ATTEMPTS = 3
+
+# Title classification cache: entries kept in memory, and rows kept in the database
+CLASSIFICATION_CACHE_SIZE = 10000
+CLASSIFICATION_CACHE_MAX_ROWS = 200000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,12 @@
+"""
+Settings for serving the site under ASGI (myweb/asgi.py).
+
+The same as myweb/settings.py, but the section list views and the API run
+their async versions, which wait on the database and the cache without
+holding a thread. Connections are not persisted (CONN_MAX_AGE stays 0):
+under ASGI each request gets its own, so put PgBouncer in front of PostgreSQL
+rather than raising max_connections when running many workers.
+"""
+from myweb.settings import *  # noqa: F401,F403
+
+ASYNC_VIEWS = True
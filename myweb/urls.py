@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path,include
 
+from webapp.thumbnails import serve_thumbnail
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path(f"{settings.MEDIA_URL.strip('/')}/thumbs/<path:path>", serve_thumbnail, name='thumbnail'),
     path('',include('webapp.urls')),
 ]
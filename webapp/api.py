@@ -0,0 +1,242 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from webapp.crawler.sections import FEED, SECTIONS
+from webapp.pagination import decode_cursor, encode_cursor, older_than, page_size
+from webapp.search import MAX_PAGE, search as search_articles
+
+
+def api_error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def parse_fields(section, value):
+    """Public field names requested with `?fields=`, or None if one is unknown."""
+    available = section.public_fields
+    if not value:
+        return list(available)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    return fields if all(name in available for name in fields) else None
+
+
+def parse_per_page(request):
+    """The `per_page` query parameter, capped by ARTICLES_MAX_PER_PAGE, or None if it is not a positive number."""
+    if not request.GET.get('per_page'):
+        return page_size(request)
+    try:
+        size = int(request.GET['per_page'])
+    except ValueError:
+        return None
+    return page_size(request) if size > 0 else None
+
+
+def parse_since(value):
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return timezone.make_aware(since, dt_timezone.utc) if timezone.is_naive(since) else since
+
+
+class PageEncoder:
+    """
+    Encodes a page of `size` articles as JSON one article at a time, as the rows are read.
+
+    The query reads one row more than the page; seeing it means there is a next
+    page, whose cursor goes at the end.
+    """
+
+    def __init__(self, section, fields, size):
+        self.section = section
+        self.fields = fields
+        self.size = size
+        self.count = 0
+        self.last = None
+        self._encoder = DjangoJSONEncoder()
+
+    def head(self):
+        return f'{{"section": {json.dumps(self.section.name)}, "results": ['
+
+    def item(self, row):
+        """The chunk for `row`, or None once the page is full."""
+        if self.count == self.size:
+            return None
+        columns = self.section.public_fields
+        item = {name: getattr(row, columns[name]) for name in self.fields}
+        chunk = (',' if self.count else '') + self._encoder.encode(item)
+        self.count += 1
+        self.last = row
+        return chunk
+
+    def tail(self, has_next):
+        last = self.last
+        cursor = encode_cursor(getattr(last, self.section.timestamp_field), last.pk) if has_next and last else None
+        return f'], "next": {json.dumps(cursor)}}}'
+
+
+def stream_page(page, rows):
+    yield page.head()
+    for row in rows:
+        chunk = page.item(row)
+        if chunk is None:
+            yield page.tail(has_next=True)
+            return
+        yield chunk
+    yield page.tail(has_next=False)
+
+
+async def astream_page(page, rows):
+    # ASGI streams async iterators; a plain generator would be buffered in a thread first
+    yield page.head()
+    async for row in rows:
+        chunk = page.item(row)
+        if chunk is None:
+            yield page.tail(has_next=True)
+            return
+        yield chunk
+    yield page.tail(has_next=False)
+
+
+def articles_query(request, section):
+    """
+    `(PageEncoder, rows query)` for an article listing request, or an error
+    response for the request's first invalid parameter.
+    """
+    if section == FEED.name:
+        section = FEED
+    elif section in SECTIONS:
+        section = SECTIONS[section]
+    else:
+        return api_error(f"Unknown section '{section}'", status=404)
+
+    fields = parse_fields(section, request.GET.get('fields'))
+    if fields is None:
+        return api_error(f"Unknown field in 'fields'; choose from {', '.join(section.public_fields)}")
+
+    queryset = section.model.objects.all()
+    if section is FEED and request.GET.get('section'):
+        if request.GET['section'] not in SECTIONS:
+            return api_error(f"Unknown section '{request.GET['section']}'")
+        queryset = queryset.filter(section=request.GET['section'])
+    if request.GET.get('since'):
+        since = parse_since(request.GET['since'])
+        if since is None:
+            return api_error("'since' must be an ISO 8601 timestamp")
+        queryset = queryset.filter(**{f'{section.timestamp_field}__gte': since})
+
+    cursor = None
+    if request.GET.get('after'):
+        cursor = decode_cursor(request.GET['after'])
+        if cursor is None:
+            return api_error("Invalid 'after' cursor")
+    size = parse_per_page(request)
+    if size is None:
+        return api_error("'per_page' must be a positive number")
+
+    # The cursor needs the id and timestamp even when they are not requested
+    columns = {section.public_fields[name] for name in fields} | {'id', section.timestamp_field}
+    rows = older_than(queryset.only(*columns), section.timestamp_field, cursor)[:size + 1]
+    return PageEncoder(section, fields, size), rows
+
+
+@require_GET
+def articles(request, section):
+    """
+    Read-only article listing for one section, newest first.
+
+    `latest` lists every section's articles from the cross-section feed, with a
+    `section` field on each article and an optional `?section=` filter.
+
+    Query parameters:
+      fields    comma-separated subset of id, title, link, image_url, category,
+                summary, published_at, source_published_at (and section for
+                `latest`); only those columns are loaded
+      since     ISO 8601 timestamp; only articles stored at or after it
+      after     cursor from the previous page's "next"
+      per_page  page size (capped by ARTICLES_MAX_PER_PAGE)
+
+    The response is streamed as the rows are read from the database.
+    """
+    query = articles_query(request, section)
+    if isinstance(query, JsonResponse):
+        return query
+    page, rows = query
+    return StreamingHttpResponse(stream_page(page, rows.iterator()), content_type='application/json')
+
+
+@require_GET
+async def aarticles(request, section):
+    """`articles()` for the ASGI profile, reading the page with the async ORM."""
+    query = articles_query(request, section)
+    if isinstance(query, JsonResponse):
+        return query
+    page, rows = query
+    return StreamingHttpResponse(astream_page(page, rows), content_type='application/json')
+
+
+def search_params(request):
+    """`(query, section, fields, page number, page size)` for a search request, or an error response."""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return api_error("'q' is required")
+    section = request.GET.get('section')
+    if section and section not in SECTIONS:
+        return api_error(f"Unknown section '{section}'")
+    fields = parse_fields(FEED, request.GET.get('fields'))
+    if fields is None:
+        return api_error(f"Unknown field in 'fields'; choose from {', '.join(FEED.public_fields)}")
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        return api_error("'page' must be a number")
+    if number > MAX_PAGE:
+        return api_error(f"'page' must be at most {MAX_PAGE}")
+    size = parse_per_page(request)
+    if size is None:
+        return api_error("'per_page' must be a positive number")
+    return query, section, fields, number, size
+
+
+def search_response(query, section, fields, number, size):
+    """Run a search with the parameters from `search_params()` and encode its page."""
+    page = search_articles(query, section=section, page=number, per_page=size)
+    return JsonResponse({
+        'query': query,
+        'results': [{name: getattr(row, name) for name in fields} for row in page],
+        'page': page.number,
+        'next': page.next_page_number if page.has_next else None,
+    })
+
+
+@require_GET
+def search(request):
+    """
+    Full-text search over every section's titles and summaries, best match first.
+
+    Query parameters:
+      q         the words to look for; all of them must match
+      section   only articles from this section
+      fields    as for the article listing, plus section
+      page      1-based page number
+      per_page  page size (capped by ARTICLES_MAX_PER_PAGE)
+    """
+    params = search_params(request)
+    if isinstance(params, JsonResponse):
+        return params
+    return search_response(*params)
+
+
+@require_GET
+async def asearch(request):
+    """`search()` for the ASGI profile."""
+    params = search_params(request)
+    if isinstance(params, JsonResponse):
+        return params
+    # The ranking query is raw SQL, which has no async API; it runs in the request's database thread
+    return await sync_to_async(search_response)(*params)
@@ -0,0 +1,22 @@
+import time
+
+STUB_LABEL = 'LABEL_0'
+
+
+class StubClassifier:
+    """
+    Stands in for the transformers text-classification pipeline in benchmarks.
+
+    It takes the same arguments and returns the same shape of result, with a fixed
+    label, after sleeping `delay` seconds per title to model inference cost.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        if isinstance(texts, str):
+            texts = [texts]
+        if self.delay:
+            time.sleep(self.delay * len(texts))
+        return [{'label': STUB_LABEL, 'score': 1.0} for _ in texts]
@@ -0,0 +1,100 @@
+import http.client
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, share):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(int(round(share * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class LoadRun:
+    """
+    Closed-loop load: `concurrency` clients each send their next request as soon
+    as the previous one is answered, over one keep-alive connection per client,
+    cycling through `paths`. Latencies are only kept for requests started after
+    the `warmup` period.
+    """
+
+    def __init__(self, base_url, paths, concurrency, duration, warmup=1.0, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.paths = paths
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.latencies = []
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _client(self, offset, measure_from, stop_at):
+        connection = self._connect()
+        latencies, statuses = [], Counter()
+        number = offset
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                break
+            path = self.paths[number % len(self.paths)]
+            number += 1
+            try:
+                connection.request('GET', self.prefix + path)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = 'error'
+                connection.close()
+                connection = self._connect()
+            if started >= measure_from:
+                latencies.append(time.perf_counter() - started)
+                statuses[status] += 1
+        connection.close()
+        with self._lock:
+            self.latencies += latencies
+            self.statuses += statuses
+
+    def run(self):
+        start = time.perf_counter()
+        measure_from = start + self.warmup
+        stop_at = measure_from + self.duration
+        threads = [
+            threading.Thread(target=self._client, args=(offset, measure_from, stop_at), daemon=True)
+            for offset in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.result()
+
+    def result(self):
+        latencies = sorted(self.latencies)
+        ms = lambda value: round(value * 1000, 2) if value is not None else None  # noqa: E731
+        errors = sum(count for status, count in self.statuses.items() if status == 'error' or status >= 500)
+        return {
+            'concurrency': self.concurrency,
+            'requests': len(latencies),
+            'requests_per_second': len(latencies) / self.duration if self.duration else 0.0,
+            'errors': errors,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'latency_ms': {
+                'p50': ms(percentile(latencies, 0.50)),
+                'p90': ms(percentile(latencies, 0.90)),
+                'p99': ms(percentile(latencies, 0.99)),
+                'max': ms(latencies[-1] if latencies else None),
+            },
+        }
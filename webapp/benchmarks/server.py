@@ -0,0 +1,237 @@
+import html
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta, timezone
+from zlib import crc32
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+ARTICLE_FIXTURES = ['article.html', 'article_og_image.html']
+
+# Section page path -> prefix of the article links it carries, as on the real site
+SECTION_PAGES = {
+    '/': ['/news/articles/'],
+    '/news': ['/news/articles/'],
+    '/sport': ['/sport/football/articles/', '/sport/tennis/articles/'],
+    '/business': ['/business/articles/'],
+    '/innovation': ['/innovation/articles/'],
+    '/travel': ['/travel/article/'],
+}
+
+# Time the generated feed items count back from, one minute apart, so every run sees the same feeds
+FEED_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+WORDS = (
+    'minister election storm market shares climate talks police court ruling hospital strike '
+    'energy prices rail workers union budget tax league final injury transfer coach striker '
+    'tournament record season startup robot battery chip satellite launch vaccine study '
+    'scientists ocean wildfire flood drought harvest airline airport border talks summit '
+    'ceasefire protest parliament vote campaign festival museum island coast mountain city '
+    'village bridge river school teachers students exam housing rents mortgage inflation bank '
+    'rates jobs factory exports tariffs oil gas wind solar nuclear grid app privacy data'
+).split()
+
+
+def feed_path(section_path):
+    """Path of the RSS feed the stand-in serves alongside a section page, e.g. /feeds/sport.xml."""
+    return f"/feeds/{section_path.strip('/') or 'home'}.xml"
+
+
+FEED_PATHS = {feed_path(path): path for path in SECTION_PAGES}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as fh:
+        return fh.read()
+
+
+class StandInSite:
+    """
+    A local HTTP server that stands in for the BBC site during benchmarks.
+
+    Section and article pages are rendered from the recorded page shapes in
+    `fixtures/`, with text generated from the request path, so every run sees
+    the same pages. Each response can be delayed by `latency` (+ up to `jitter`)
+    seconds, and `error_rate` of article requests fail with a 500. Section pages
+    link to `articles_per_section` articles each; the home page shares its links
+    with /news, as on the real site. Each section page also has an RSS feed (see
+    `feed_path()`) listing the same articles; `feed_image_rate` of its items
+    carry a thumbnail, the rest only a title and summary.
+
+    Throttling can be injected as well: beyond `capacity` requests in flight, the
+    site answers 429 with a `Retry-After` of `retry_after` seconds, and every
+    request in flight beyond `capacity / 2` adds `overload_latency` seconds to the
+    response delay, so the site slows down before it starts refusing requests.
+    `throttle_rate` of article requests are answered 429 regardless of load.
+
+    With `etags`, every page and feed carries an `ETag` and a matching
+    `If-None-Match` is answered with a 304, as on the real site.
+    """
+
+    def __init__(self, articles_per_section=40, latency=0.0, jitter=0.0, error_rate=0.0, state_size=20000, seed=0,
+                 capacity=None, retry_after=1, overload_latency=0.0, throttle_rate=0.0, feed_image_rate=0.75,
+                 etags=False):
+        self.articles_per_section = articles_per_section
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.state_size = state_size  # Bytes of inline JSON per page; real pages carry a large script blob
+        self.seed = seed
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.overload_latency = overload_latency
+        self.throttle_rate = throttle_rate
+        self.feed_image_rate = feed_image_rate
+        self.etags = etags
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.templates = {
+            name: load_fixture(name)
+            for name in ['section.html', 'card.html', 'feed.xml', 'feed_item.xml'] + ARTICLE_FIXTURES
+        }
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+        self._faults = random.Random(seed)  # Latency and error draws, shared by the handler threads
+        self._server = None
+
+    @property
+    def requests(self):
+        return sum(self.statuses.values())
+
+    def start(self):
+        """Start serving on a free local port and return the site's base URL."""
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with site._lock:
+                    site.in_flight += 1
+                    site.peak_in_flight = max(site.peak_in_flight, site.in_flight)
+                    load = site.in_flight
+                try:
+                    status, body, headers = site.respond(self.path, load, self.headers.get('If-None-Match'))
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+                        site.statuses[status] += 1
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in {'Content-Type': 'text/html; charset=utf-8', **headers}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _random(self, path):
+        return random.Random(crc32(f'{self.seed}:{path}'.encode()))
+
+    def respond(self, path, load=1, if_none_match=None):
+        """`(status, body, extra headers)` for a request path, with `load` requests in flight including it."""
+        path = path.split('?', 1)[0]
+        rng = self._random(path)
+        with self._lock:
+            delay = self.latency + self._faults.uniform(0, self.jitter)
+            failed = self._faults.random() < self.error_rate
+            throttled = self._faults.random() < self.throttle_rate
+        over_capacity = self.capacity and load > self.capacity
+        listing = path in SECTION_PAGES or path in FEED_PATHS
+        if over_capacity or (throttled and not listing):
+            return 429, '<h1>Too Many Requests</h1>', {'Retry-After': str(self.retry_after)}
+        if self.capacity:
+            delay += max(0, load - self.capacity / 2) * self.overload_latency
+        if delay:
+            time.sleep(delay)
+        # Pages are generated from their path, so the path's checksum is a strong validator
+        etag = {'ETag': f'"{self.seed}-{crc32(path.encode()):08x}"'} if self.etags else {}
+        if etag and if_none_match == etag['ETag'] and (listing or not failed):
+            return 304, '', etag
+        if path in SECTION_PAGES:
+            return 200, self.section_page(path, rng), etag
+        if path in FEED_PATHS:
+            return 200, self.feed(FEED_PATHS[path]), {'Content-Type': 'application/rss+xml; charset=utf-8', **etag}
+        if failed:
+            return 500, '<h1>Internal Server Error</h1>', {}
+        return 200, self.article_page(path, rng), etag
+
+    def _sentence(self, rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def _state(self, rng):
+        # Roughly `state_size` bytes of JSON, like the hydration data embedded in real pages
+        items = [{'id': rng.getrandbits(48), 'text': self._sentence(rng, 12)} for _ in range(self.state_size // 100)]
+        return json.dumps({'props': {'items': items}})
+
+    def cards(self, path):
+        """`(href, image, title, summary, card_rng)` of each article listed on a section page."""
+        prefixes = SECTION_PAGES[path]
+        for number in range(self.articles_per_section):
+            href = f'{prefixes[number % len(prefixes)]}bench{self.seed}-{number:05d}'
+            card_rng = self._random(href)
+            image = f'{card_rng.getrandbits(64):016x}'
+            yield href, image, self._sentence(card_rng, 9), self._sentence(card_rng, 20), card_rng
+
+    def section_page(self, path, rng):
+        cards = [
+            self.templates['card.html'].format(
+                href=href, image=image, title=html.escape(title), summary=html.escape(summary),
+            )
+            for href, image, title, summary, _ in self.cards(path)
+        ]
+        return self.templates['section.html'].format(
+            heading=html.escape(path.strip('/').capitalize() or 'Home'),
+            state=self._state(rng),
+            cards='\n'.join(cards),
+        )
+
+    def feed(self, path):
+        items = []
+        for number, (href, image, title, summary, card_rng) in enumerate(self.cards(path)):
+            media = ''
+            if card_rng.random() < self.feed_image_rate:
+                media = (f'<media:thumbnail width="240" height="135" '
+                         f'url="https://ichef.bbci.co.uk/ace/standard/240/cpsprodpb/{image}.jpg"/>')
+            items.append(self.templates['feed_item.xml'].format(
+                href=href, title=title, summary=summary, media=media,
+                published=format_datetime(FEED_EPOCH - timedelta(minutes=number), usegmt=True),
+            ))
+        return self.templates['feed.xml'].format(
+            heading=path.strip('/').capitalize() or 'Home',
+            items=''.join(items),
+        )
+
+    def article_page(self, path, rng):
+        template = self.templates[ARTICLE_FIXTURES[crc32(path.encode()) % len(ARTICLE_FIXTURES)]]
+        # The same generator as the section card, so headline and card agree
+        card_rng = self._random(path)
+        card_rng.getrandbits(64)
+        return template.format(
+            title=html.escape(self._sentence(card_rng, 9)),
+            summary=html.escape(self._sentence(card_rng, 20)),
+            image=f'{rng.getrandbits(64):016x}',
+            byline=html.escape(self._sentence(rng, 3)),
+            caption=html.escape(self._sentence(rng, 8)),
+            state=self._state(rng),
+            paragraphs='\n'.join(f'      <p>{html.escape(self._sentence(rng, 30))}</p>' for _ in range(12)),
+        )
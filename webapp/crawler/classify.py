@@ -0,0 +1,223 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+MODEL_NAME = 'distilbert-base-uncased'
+DEFAULT_BATCH_SIZE = 32
+UNKNOWN_LABEL = 'Unknown'
+
+_classifier = None
+_classifier_lock = threading.Lock()
+# One forward pass at a time: the pipeline is shared by every crawl in the process and is not thread-safe
+_inference_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_classifier():
+    """
+    Return the process-wide text-classification pipeline, loading it on first use.
+
+    transformers (and with it torch and the model weights) is only imported here, so
+    importing a scraper command, running `--help` or a crawl with nothing new to
+    classify never pays for it.
+    """
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            from transformers import pipeline
+
+            _classifier = pipeline('text-classification', model=MODEL_NAME)
+        return _classifier
+
+
+def set_classifier(classifier):
+    """
+    Replace the process-wide pipeline, e.g. with a stub in the benchmarks, and return the previous one.
+
+    Passing None makes the next `get_classifier()` load the real model again.
+    """
+    global _classifier
+    with _classifier_lock:
+        previous, _classifier = _classifier, classifier
+        return previous
+
+
+def limit_torch_threads(threads):
+    """Cap the intra-op thread count torch uses for CPU inference."""
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def normalise_title(title):
+    """Fold case, Unicode forms and whitespace; the model is uncased so the label is unaffected."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', title)).strip().lower()
+
+
+def title_key(title, model_name=MODEL_NAME):
+    return hashlib.sha256(f"{model_name}\0{normalise_title(title)}".encode()).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Labels already produced for a title by a given model.
+
+    Lookups go to an in-memory LRU first and then to the `TitleClassification` table.
+    Keys include the model id, so switching models never serves old labels; `prune()`
+    deletes rows left behind by other models and evicts the least recently used rows
+    beyond `max_rows`. The crawler prunes once per crawl, not per chunk.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, size=None, max_rows=None):
+        self.model_name = model_name
+        self.size = settings.CLASSIFICATION_CACHE_SIZE if size is None else size
+        self.max_rows = settings.CLASSIFICATION_CACHE_MAX_ROWS if max_rows is None else max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, label):
+        with self._lock:
+            self._memory[key] = label
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.size:
+                self._memory.popitem(last=False)
+
+    def get_many(self, titles):
+        """Return a `{title: label}` dict for the titles that have a cached label."""
+        from webapp.models import TitleClassification
+
+        keys = {title: title_key(title, self.model_name) for title in titles}
+        found = {}
+        with self._lock:
+            for title, key in keys.items():
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[title] = self._memory[key]
+
+        missing = {key: title for title, key in keys.items() if title not in found}
+        if missing:
+            rows = TitleClassification.objects.filter(key__in=list(missing)).values_list('key', 'label')
+            hits = []
+            for key, label in rows:
+                found[missing[key]] = label
+                self._remember(key, label)
+                hits.append(key)
+            if hits:
+                TitleClassification.objects.filter(key__in=hits).update(last_used_at=timezone.now())
+        return found
+
+    def set_many(self, labels):
+        """Store a `{title: label}` dict in both tiers."""
+        from webapp.models import TitleClassification
+
+        rows = []
+        for title, label in labels.items():
+            key = title_key(title, self.model_name)
+            self._remember(key, label)
+            rows.append(TitleClassification(key=key, model_name=self.model_name, label=label))
+        TitleClassification.objects.bulk_create(rows, ignore_conflicts=True)
+
+    def prune(self):
+        """Drop rows from other models and evict the oldest rows over `max_rows`."""
+        from webapp.models import TitleClassification
+
+        TitleClassification.objects.exclude(model_name=self.model_name).delete()
+        # Walking the pk index is far cheaper than the ordered scan below, which is only needed when over
+        if not TitleClassification.objects.order_by('pk').values_list('pk', flat=True)[self.max_rows:self.max_rows + 1]:
+            return
+        cutoff = (
+            TitleClassification.objects.order_by('-last_used_at', '-id')
+            .values_list('last_used_at', 'id')[self.max_rows:self.max_rows + 1]
+        )
+        if cutoff:
+            last_used_at, pk = cutoff[0]
+            TitleClassification.objects.filter(
+                Q(last_used_at__lt=last_used_at) | Q(last_used_at=last_used_at, id__lte=pk)
+            ).delete()
+
+    def clear(self):
+        from webapp.models import TitleClassification
+
+        with self._lock:
+            self._memory.clear()
+        TitleClassification.objects.all().delete()
+
+
+def get_classification_cache():
+    """Return the process-wide `ClassificationCache`, so its memory tier outlives a single crawl."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ClassificationCache()
+        return _cache
+
+
+def _run_classifier(classifier, titles, batch_size, on_error):
+    """Labels for `titles` in order, or None for each title the model failed on."""
+    with _inference_lock:
+        return _run_batches(classifier, titles, batch_size, on_error)
+
+
+def _run_batches(classifier, titles, batch_size, on_error):
+    labels = []
+    for start in range(0, len(titles), batch_size):
+        batch = titles[start:start + batch_size]
+        try:
+            results = classifier(batch, batch_size=batch_size, truncation=True)
+            labels.extend(result['label'] for result in results)
+        except Exception:
+            for title in batch:
+                try:
+                    labels.append(classifier(title, truncation=True)[0]['label'])
+                except Exception as e:
+                    labels.append(None)
+                    if on_error:
+                        on_error(e)
+    return labels
+
+
+def classify_titles(titles, classifier=None, batch_size=DEFAULT_BATCH_SIZE, threads=None, on_error=None, cache=None):
+    """
+    Classify `titles` with a text-classification pipeline, `batch_size` titles per forward pass.
+
+    `classifier` defaults to the shared pipeline from `get_classifier()`. With a
+    `cache`, titles that already have a label skip the model entirely and new labels
+    are stored for the next run.
+
+    Returns one label per title, in the same order. If a batch fails it is retried one
+    title at a time, so only the titles that actually fail fall back to 'Unknown';
+    each failure is passed to `on_error`.
+    """
+    labels = cache.get_many(titles) if cache else {}
+
+    # Headlines that only differ in case or spacing go through the model once
+    pending_by_key = {}
+    for title in titles:
+        if title not in labels:
+            pending_by_key.setdefault(normalise_title(title), []).append(title)
+    pending = [group[0] for group in pending_by_key.values()]
+
+    if pending:
+        if classifier is None:
+            classifier = get_classifier()
+        if threads:
+            limit_torch_threads(threads)
+        new_labels = {
+            title: label
+            for title, label in zip(pending, _run_classifier(classifier, pending, batch_size, on_error))
+            if label is not None
+        }
+        if cache and new_labels:
+            cache.set_many(new_labels)
+        for title, label in new_labels.items():
+            for same_title in pending_by_key[normalise_title(title)]:
+                labels[same_title] = label
+
+    return [labels.get(title, UNKNOWN_LABEL) for title in titles]
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from webapp.crawler.classify import DEFAULT_BATCH_SIZE
+from webapp.crawler.dedup import DUPLICATE_POLICIES
+from webapp.crawler.fetch import DEFAULT_PER_HOST, DEFAULT_WORKERS
+from webapp.crawler.pipeline import DEFAULT_CHUNK_SIZE, DISCOVERY_MODES, Crawler
+from webapp.crawler.sections import SECTIONS
+
+
+class CrawlCommand(BaseCommand):
+    """Base for the scraper commands: shared crawl options and the `Crawler` built from them."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                            help='Number of article pages fetched concurrently')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                            help='Maximum concurrent requests sent to a single host')
+        parser.add_argument('--ignore-cache', action='store_true',
+                            help='Fetch feeds and section pages even when they are unchanged since the last run')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Fetch every linked article, including ones that are already stored')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of titles classified per model call')
+        parser.add_argument('--torch-threads', type=int, default=None,
+                            help='Maximum number of threads torch may use for classification')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Number of articles classified and saved per database transaction')
+        parser.add_argument('--duplicates', choices=DUPLICATE_POLICIES, default=settings.CRAWLER_DUPLICATE_POLICY,
+                            help="Near-duplicates of stored stories: store them with the original's category but "
+                                 "hide them from the cross-section feed (hide), drop them (skip), or treat them as "
+                                 "new (keep)")
+        parser.add_argument('--discovery', choices=DISCOVERY_MODES, default=settings.CRAWLER_DISCOVERY,
+                            help="Find articles in the section's feeds and sitemaps, scraping its page only when "
+                                 "none is usable (feeds), or always scrape the section page (anchors)")
+        parser.add_argument('--no-thumbnails', action='store_true',
+                            help='Do not download the images of stored articles to make thumbnails')
+        parser.add_argument('--quiet', action='store_true', help='Do not print a line for every article')
+        parser.add_argument('--metrics-json', default=settings.CRAWLER_METRICS_JSON,
+                            help='Write a JSON run report here; {crawl} is replaced by the sections crawled')
+        parser.add_argument('--metrics-textfile', default=settings.CRAWLER_METRICS_TEXTFILE,
+                            help='Write Prometheus metrics here for the textfile collector; {crawl} as above')
+
+    def get_crawler(self, **kwargs):
+        # Kept on the command so callers such as the benchmarks can read its timings afterwards
+        self.crawler = Crawler(
+            self.stdout,
+            self.stderr,
+            workers=kwargs['workers'],
+            per_host=kwargs['per_host'],
+            refresh=kwargs['refresh'],
+            ignore_cache=kwargs['ignore_cache'],
+            batch_size=kwargs['batch_size'],
+            torch_threads=kwargs['torch_threads'],
+            chunk_size=kwargs['chunk_size'],
+            duplicates=kwargs['duplicates'],
+            quiet=kwargs['quiet'],
+            thumbnails=not kwargs['no_thumbnails'],
+            discovery=kwargs['discovery'],
+        )
+        return self.crawler
+
+    def crawl(self, sections, options):
+        """Crawl `sections` and write the run's metrics where the command's `options` ask for them."""
+        crawler = self.get_crawler(**options)
+        crawler.crawl(sections)
+        if options['metrics_json']:
+            crawler.metrics.write_json(options['metrics_json'].format(crawl=crawler.metrics.crawl))
+        if options['metrics_textfile']:
+            crawler.metrics.write_textfile(options['metrics_textfile'].format(crawl=crawler.metrics.crawl))
+
+
+class SectionCommand(CrawlCommand):
+    """A command that crawls a single section, named by `section`."""
+
+    section = None
+
+    def handle(self, *args, **kwargs):
+        self.crawl([SECTIONS[self.section]], kwargs)
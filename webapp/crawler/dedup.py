@@ -0,0 +1,131 @@
+import hashlib
+import random
+import re
+import struct
+
+from django.conf import settings
+
+from webapp.crawler.classify import normalise_title
+from webapp.crawler.extract import NO_TITLE
+
+# 32 MinHash values, split into 8 LSH bands of 4. Two stories are looked up as
+# candidates when they agree on a whole band, which happens with probability
+# 1 - (1 - s^4)^8 for wording similarity s: ~0.99 at s=0.8, ~0.67 at s=0.6, ~0.06 at s=0.3.
+PERMUTATIONS = 32
+BANDS = 8
+ROWS = PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed so that signatures stay comparable across runs and processes
+_random = random.Random(20250117)
+_COEFFICIENTS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME)) for _ in range(PERMUTATIONS)
+]
+_PACKING = struct.Struct(f'>{PERMUTATIONS}Q')
+
+# What to do with a near-duplicate of a stored story
+DUPLICATE_POLICIES = ['hide', 'skip', 'keep']
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+
+
+def shingles(text):
+    """The words and word pairs of `text`, after the same normalisation as the classification cache."""
+    words = re.findall(r'\w+', normalise_title(text))
+    return set(words) | {f'{first} {second}' for first, second in zip(words, words[1:])}
+
+
+def minhash(text):
+    """MinHash of `text`'s shingles: the fraction of equal positions estimates their Jaccard similarity."""
+    hashes = [_feature_hash(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return (MERSENNE_PRIME,) * PERMUTATIONS
+    return tuple(min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in _COEFFICIENTS)
+
+
+def story_signature(title, summary):
+    """MinHash of an article's title and summary, or None if its title could not be extracted."""
+    if title == NO_TITLE:
+        return None  # Error and placeholder pages would otherwise all look like one story
+    return minhash(f"{title} {summary or ''}")
+
+
+def band_keys(signature):
+    """One signed 64-bit key per band, hashing the band's position along with its values."""
+    keys = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr((band, values)).encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+class Story:
+    """A story in the signature index, or one seen earlier in the chunk being ingested."""
+
+    def __init__(self, link, signature, category=None):
+        self.link = link
+        self.signature = signature
+        self.category = category  # None until the story has been classified
+
+
+class StoryIndex:
+    """
+    Near-duplicate lookup over the MinHash signatures of stored stories.
+
+    Each signature is cut into LSH bands and every band is stored as an indexed
+    key. A lookup reads only the stories sharing a band key with the article and
+    then checks their estimated similarity, so its cost depends on how many
+    similar stories there are, not on how many are stored.
+    """
+
+    def __init__(self, min_similarity=None):
+        self.min_similarity = settings.CRAWLER_DUPLICATE_SIMILARITY if min_similarity is None else min_similarity
+
+    def candidates(self, signatures):
+        """Stored stories sharing at least one band key with any of `signatures`."""
+        from webapp.models import StorySignature
+
+        keys = {key for signature in signatures for key in band_keys(signature)}
+        if not keys:
+            return []
+        rows = (
+            StorySignature.objects.filter(bands__key__in=keys).distinct()
+            .values_list('link', 'minhash', 'category')
+        )
+        return [Story(link, _PACKING.unpack(bytes(packed)), category) for link, packed, category in rows]
+
+    def find(self, signature, link, stories):
+        """The most similar of `stories` to `signature`, if similar enough, ignoring `link` itself."""
+        best = None
+        for story in stories:
+            if story.link == link:
+                continue
+            score = similarity(signature, story.signature)
+            if score >= self.min_similarity and (best is None or score > best[0]):
+                best = (score, story)
+        return best[1] if best else None
+
+    def add(self, stories):
+        from webapp.models import StoryBand, StorySignature
+
+        stored = set(StorySignature.objects.filter(link__in=[story.link for story in stories])
+                     .values_list('link', flat=True))
+        stories = [story for story in stories if story.link not in stored]
+        StorySignature.objects.bulk_create([
+            StorySignature(link=story.link, minhash=_PACKING.pack(*story.signature), category=story.category)
+            for story in stories
+        ], ignore_conflicts=True)
+        # Not every backend returns ids from an insert that ignores conflicts
+        ids = dict(StorySignature.objects.filter(link__in=[story.link for story in stories]).values_list('link', 'pk'))
+        StoryBand.objects.bulk_create([
+            StoryBand(story_id=ids[story.link], key=key)
+            for story in stories if story.link in ids
+            for key in band_keys(story.signature)
+        ])
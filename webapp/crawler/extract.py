@@ -0,0 +1,189 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from django.conf import settings
+from lxml import etree
+
+TITLE_SELECTORS = ['h3', 'h1']
+SUMMARY_SELECTOR = 'p'
+IMAGE_SELECTORS = ['img', 'meta[property="og:image"]']
+PLACEHOLDER_KEYWORDS = ['grey-placeholder', 'placeholder', 'no-image']
+NO_TITLE = "No Title Available"
+
+# Everything outside these elements is skipped while building the BeautifulSoup tree
+ARTICLE_STRAINER = SoupStrainer(['h1', 'h3', 'p', 'img', 'meta'])
+
+# Compiled once: XPath equivalents of `select_one()` for each selector above
+FIRST_MATCH = {
+    'h3': etree.XPath('(//h3)[1]'),
+    'h1': etree.XPath('(//h1)[1]'),
+    'p': etree.XPath('(//p)[1]'),
+    'img': etree.XPath('(//img)[1]'),
+    'meta[property="og:image"]': etree.XPath('(//meta[@property="og:image"])[1]'),
+}
+# Text inside these is not page text to BeautifulSoup's `.text`, so it is skipped here too
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+
+# Check if the image URL is a valid one
+def is_valid_image_url(url):
+    # Keywords that are typically part of placeholder image URLs
+    if any(keyword in url.lower() for keyword in PLACEHOLDER_KEYWORDS):
+        return False
+    return True
+
+
+def extract_links(content, selector):
+    """Relative hrefs of every anchor on a section page matching `selector`."""
+    soup = BeautifulSoup(content, 'html.parser', parse_only=SoupStrainer('a'))
+    return set(link['href'] for link in soup.select(selector) if link.get('href'))
+
+
+UTF8_PARSER = etree.HTMLParser(encoding='utf-8')
+DETECTING_PARSER = etree.HTMLParser()
+
+
+def parse_html(content):
+    """
+    Parse an HTML page with lxml's C parser, returning the root element (None if empty).
+
+    Like BeautifulSoup, UTF-8 is tried first before falling back to the page's own
+    declared encoding.
+    """
+    if not content or not content.strip():
+        return None
+    parser = DETECTING_PARSER
+    if isinstance(content, bytes):
+        try:
+            content.decode('utf-8')
+            parser = UTF8_PARSER
+        except UnicodeDecodeError:
+            pass
+    return etree.fromstring(content, parser)
+
+
+class LxmlPage:
+    """
+    Article page parsed by lxml and queried with the precompiled XPath plans.
+
+    Only the handful of elements the plans return ever become Python objects.
+    libxml2 repairs malformed markup as browsers do, where `html.parser` keeps it
+    as written: it closes a `<p>` when a block element opens inside it and moves
+    a `<p>` out of an `<h3>`, so on such pages the title and summary can differ
+    from the original scraper's. Opt in with `CRAWLER_HTML_PARSER = 'lxml'`.
+    """
+
+    def __init__(self, content):
+        self.root = parse_html(content)
+
+    def first(self, selector):
+        if self.root is None:
+            return None
+        matches = FIRST_MATCH[selector](self.root)
+        return matches[0] if matches else None
+
+    @staticmethod
+    def text(element):
+        """Concatenated text of `element` and its descendants, like BeautifulSoup's `.text`."""
+        parts = [element.text or ''] if element.tag not in NON_TEXT_TAGS else []
+        for node in element.iterdescendants():
+            if isinstance(node.tag, str) and node.tag not in NON_TEXT_TAGS and node.text:
+                parts.append(node.text)  # Comments and processing instructions contribute no text
+            if node.tail:
+                parts.append(node.tail)
+        return ''.join(parts)
+
+
+class StrainedSoup(BeautifulSoup):
+    """
+    BeautifulSoup restricted by `parse_only`, with the same element boundaries as a full parse.
+
+    A strainer drops the elements around the ones it keeps, so their end tags
+    no longer close what was left open inside them: `<div><h3>Title</div><p>x</p>`
+    would give an `h3` of "Titlex" instead of "Title". The names of the dropped
+    open elements are kept here, and an end tag for one of them closes every
+    element kept since, as the full tree would.
+    """
+
+    def reset(self):
+        super().reset()
+        self.dropped = []  # Names of the open elements the strainer left out, outermost first
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs):
+        tag = super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
+        if tag is None and not self.builder.can_be_empty_element(name):
+            self.dropped.append(name)
+        return tag
+
+    def handle_endtag(self, name, nsprefix=None):
+        if not self.open_tag_counter.get(name) and name in self.dropped:
+            self.endData()
+            while len(self.tagStack) > 1:
+                self.popTag()
+            del self.dropped[len(self.dropped) - 1 - self.dropped[::-1].index(name):]
+            return
+        super().handle_endtag(name, nsprefix)
+
+
+class SoupPage:
+    """Article page parsed by BeautifulSoup's `html.parser`, keeping only the elements we read."""
+
+    def __init__(self, content):
+        self.soup = StrainedSoup(content, 'html.parser', parse_only=ARTICLE_STRAINER)
+
+    def first(self, selector):
+        return self.soup.select_one(selector)
+
+    @staticmethod
+    def text(tag):
+        return tag.text
+
+
+PAGE_ENGINES = {'lxml': LxmlPage, 'html.parser': SoupPage}
+
+
+def extract_article(content, base_url, image_attrs=('data-src', 'src'), filter_placeholders=False, engine=None):
+    """
+    Return `(title, image_url, summary)` for an article page.
+
+    `engine` defaults to `CRAWLER_HTML_PARSER`. 'html.parser' builds only the
+    elements read and gives exactly the original scrapers' output; 'lxml' is
+    faster but repairs malformed markup differently (see `LxmlPage`).
+    """
+    page = PAGE_ENGINES[engine or settings.CRAWLER_HTML_PARSER](content)
+
+    # Extract title (try multiple selectors)
+    title = None
+    for selector in TITLE_SELECTORS:
+        title_tag = page.first(selector)
+        if title_tag is not None and page.text(title_tag).strip():
+            title = page.text(title_tag).strip()
+            break
+    if not title:
+        title = NO_TITLE
+
+    # Extract image URL (try multiple selectors)
+    image_url = None
+    for selector in IMAGE_SELECTORS:
+        image_tag = page.first(selector)
+        if image_tag is not None:
+            # Prioritize lazy-loaded 'data-src' over 'src'
+            if selector == 'img':
+                image_url = next((image_tag.get(attr) for attr in image_attrs if image_tag.get(attr)), None)
+            elif selector == 'meta[property="og:image"]':
+                image_url = image_tag.get('content')
+
+            if image_url:
+                break  # Stop if we found a valid image
+
+    # Ensure the image URL is absolute
+    if image_url and not image_url.startswith('http'):
+        image_url = f"{base_url}{image_url}"
+
+    # Skip placeholder images (e.g., grey placeholder)
+    if filter_placeholders and image_url and not is_valid_image_url(image_url):
+        image_url = None
+
+    # Extract summary
+    summary_tag = page.first(SUMMARY_SELECTOR)
+    summary = page.text(summary_tag).strip() if summary_tag is not None else "No Summary Available"
+
+    return title, image_url, summary
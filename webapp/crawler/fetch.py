@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from webapp.crawler.ratelimit import RETRY_STATUSES, Stopped, backoff, get_rate_controller, parse_retry_after
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 8
+DEFAULT_TIMEOUT = 10
+# Connecting fails fast, so an unreachable host costs seconds per attempt rather than the full read timeout
+CONNECT_TIMEOUT = 3.05
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=DEFAULT_WORKERS):
+    """
+    Return the process-wide `requests.Session`.
+
+    The session keeps connections alive between requests, so every article fetched
+    from the same host reuses a pooled TCP+TLS connection instead of opening a new one.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+class ValidatorCache:
+    """
+    On-disk store of the `ETag`/`Last-Modified` validators of feeds and section pages.
+
+    There is one file per URL, shared by every section and command that reads it
+    (home and news list the same feed). It also names the sections that have
+    stored everything that version listed, and only those send the validators
+    back, so a 304 never hides articles from a section that has yet to store them.
+    Only index pages are cached: article links already stored are skipped before
+    any request, so a 304 on an article page would almost never happen.
+
+    With `deferred`, validators are only held in memory until `commit()`; the
+    crawler commits a page's once every article it listed is saved, so a 304
+    never hides an article that a failed chunk or an early stop left unsaved.
+    """
+
+    def __init__(self, section, deferred=False):
+        self.section = section
+        self.directory = settings.CRAWLER_CACHE_DIR
+        self.deferred = deferred
+        self.pending = {}  # URL -> validators not yet written, when deferred
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _read(self, url):
+        try:
+            with open(self._path(url)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def headers(self, url):
+        """Conditional request headers for `url`, empty if this section has not stored what it last listed."""
+        validators = self._read(url)
+        if self.section not in validators.get('sections', []):
+            return {}
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def store(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+        validators = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        if self.deferred:
+            self.pending[url] = validators
+        else:
+            self._write(url, validators)
+
+    def commit(self, url):
+        """Write the validators held back for `url`, if any."""
+        validators = self.pending.pop(url, None)
+        if validators:
+            self._write(url, validators)
+
+    def _write(self, url, validators):
+        stored = self._read(url)
+        sections = {self.section}
+        if (stored.get('etag'), stored.get('last_modified')) == (validators['etag'], validators['last_modified']):
+            sections.update(stored.get('sections', []))
+        path = self._path(url)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump({**validators, 'sections': sorted(sections)}, fh)
+        os.replace(tmp_path, path)
+
+
+def fetch(url, cache=None, timeout=DEFAULT_TIMEOUT, per_host=DEFAULT_PER_HOST, retries=None, on_retry=None,
+          stop=None, stream=False):
+    """
+    GET `url` through the shared session, paced by the host's `HostController`.
+
+    With a `cache`, stored validators are sent along and a 304 response is returned
+    as-is so the caller can skip parsing; fresh validators are saved on a 200.
+
+    Connection errors, timeouts and 429/502/503/504 responses are retried up to
+    `retries` times (default `CRAWLER_RETRIES`) after a jittered exponential
+    backoff, or the server's `Retry-After` if that is longer; `on_retry(url, reason)`
+    is called before each retry. The last response is returned, or its error
+    raised, once the retries are used up. `CircuitOpen` is raised without
+    sending anything while the host's breaker is open, and `Stopped` once the
+    `stop` event is set while waiting for the host or between attempts.
+
+    With `stream`, the body is left unread, as with `requests`; the caller must
+    close the response.
+    """
+    retries = settings.CRAWLER_RETRIES if retries is None else retries
+    host = get_rate_controller().host(url, per_host)
+    headers = cache.headers(url) if cache else None
+    for attempt in range(retries + 1):
+        host.acquire(stop)
+        started = time.monotonic()
+        try:
+            response = get_session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, timeout), stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            host.release(None, time.monotonic() - started)
+            if attempt == retries:
+                raise
+            reason, retry_after = type(e).__name__, None
+        except BaseException:
+            host.cancel()  # Not the host's fault, e.g. a malformed URL
+            raise
+        else:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            host.release(response.status_code, response.elapsed.total_seconds(), retry_after)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+            reason = response.status_code
+            response.close()
+        if on_retry:
+            on_retry(url, reason)
+        delay = max(backoff(attempt), min(retry_after or 0.0, settings.CRAWLER_BACKOFF_MAX))
+        if stop is None:
+            time.sleep(delay)
+        elif stop.wait(delay):
+            raise Stopped("The crawl is stopping")
+
+    if cache and response.status_code == 200:
+        cache.store(url, response)
+    return response
+
+
+def fetch_all(urls, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT, cache=None,
+              on_retry=None, stop=None):
+    """
+    Fetch `urls` on a thread pool and yield `(url, future)` pairs as each request completes.
+
+    `future.result()` returns the response, or re-raises the `RequestException` the
+    request failed with, so callers keep their usual per-article error handling.
+    With `workers=1` this behaves like the old sequential loop. `cache`, if given,
+    is the `ValidatorCache` used for every URL. Each host gets at most `per_host`
+    requests at once, fewer while its `HostController` backs off.
+    Requests still waiting when the `stop` event is set fail with `Stopped`.
+    """
+    get_session(pool_size=max(workers, DEFAULT_WORKERS))
+
+    def fetch_one(url):
+        return fetch(url, cache=cache, timeout=timeout, per_host=per_host, on_retry=on_retry, stop=stop)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(fetch_one, url): url for url in urls}
+        try:
+            for future in as_completed(futures):
+                # Drop our reference so a response can be freed as soon as the caller is done with it
+                yield futures.pop(future), future
+        finally:
+            # A caller that stops early (e.g. a crawl shutting down) leaves the queued URLs unfetched
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,33 @@
+import hashlib
+from array import array
+from bisect import bisect_left
+
+
+def link_digest(link):
+    """64-bit digest of a link; collisions are negligible below billions of links."""
+    return int.from_bytes(hashlib.blake2b(link.encode(), digest_size=8).digest(), 'big')
+
+
+class KnownLinks:
+    """
+    Compact membership set of the article links already stored for a model.
+
+    Links are kept as a sorted array of 64-bit digests (8 bytes per link instead of
+    a full URL string), so a few hundred thousand stored articles cost a few MB.
+    """
+
+    def __init__(self, digests=()):
+        self._digests = array('Q', sorted(set(digests)))
+
+    @classmethod
+    def load(cls, model, field, chunk_size=10000):
+        links = model.objects.values_list(field, flat=True).iterator(chunk_size=chunk_size)
+        return cls(link_digest(link) for link in links)
+
+    def __len__(self):
+        return len(self._digests)
+
+    def __contains__(self, link):
+        digest = link_digest(link)
+        index = bisect_left(self._digests, digest)
+        return index < len(self._digests) and self._digests[index] == digest
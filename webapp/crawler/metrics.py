@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from django.utils import timezone
+
+# Upper bounds, in seconds, of the histogram buckets; the last bucket is +Inf
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+CLASSIFY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HISTOGRAMS = {
+    'fetch_seconds': ('Latency of each page fetch, until the response headers arrived', FETCH_BUCKETS),
+    'parse_seconds': ('Time spent extracting one page', PARSE_BUCKETS),
+    'classify_seconds': ('Time spent classifying one chunk of articles', CLASSIFY_BUCKETS),
+}
+COUNTERS = {
+    'http_responses_total': 'Pages fetched, by HTTP status',
+    'discovered_total': 'Article links found, by section and source (feed or page)',
+    'skipped_total': 'Articles not stored, by reason',
+    'errors_total': 'Failures, by crawl stage',
+    'retries_total': 'Requests retried after a failure or throttling, by reason',
+    'articles_total': 'Articles written, by section and outcome',
+    'stage_seconds_total': 'Wall time spent in each crawl stage',
+    'thumbnails_total': 'Article images processed into thumbnails, by outcome',
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exposed by Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """`(upper bound, count of observations <= bound)` pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'buckets': {_format_bound(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}' if labels else ''
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as fh:
+        fh.write(text)
+    os.replace(tmp_path, path)
+
+
+class CrawlMetrics:
+    """
+    Histograms and counters for one crawl, written out at the end of the run.
+
+    `report()` is a JSON-friendly summary and `prometheus()` the same data in the
+    text exposition format, for node_exporter's textfile collector. Every metric
+    carries a `crawl` label naming the sections crawled, so several commands can
+    write textfiles side by side. The commands write both to the paths in
+    `CRAWLER_METRICS_JSON` and `CRAWLER_METRICS_TEXTFILE`, with '{crawl}' replaced
+    by that label, e.g. 'news' or 'home+news+sports'.
+    """
+
+    def __init__(self, crawl):
+        self.crawl = crawl
+        self.started_at = timezone.now()
+        self.finished_at = None
+        self.histograms = {name: Histogram(buckets) for name, (_, buckets) in HISTOGRAMS.items()}
+        self.counters = {name: Counter() for name in COUNTERS}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        if amount:
+            with self._lock:
+                self.counters[name][tuple(sorted(labels.items()))] += amount
+
+    def finish(self):
+        self.finished_at = timezone.now()
+
+    @property
+    def duration(self):
+        return ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+
+    def report(self):
+        duration = self.duration
+        pages = sum(self.counters['http_responses_total'].values())
+        stored = sum(count for labels, count in self.counters['articles_total'].items()
+                     if dict(labels)['outcome'] in ('inserted', 'updated'))
+        return {
+            'crawl': self.crawl,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': duration,
+            'pages_per_second': pages / duration if duration else None,
+            'articles_per_second': stored / duration if duration else None,
+            'histograms': {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+            'counters': {
+                name: [dict(labels, value=count) for labels, count in sorted(counter.items())]
+                for name, counter in self.counters.items()
+            },
+        }
+
+    def prometheus(self):
+        crawl = (('crawl', self.crawl),)
+        lines = []
+        for name, histogram in self.histograms.items():
+            metric = f'crawler_{name}'
+            lines += [f'# HELP {metric} {HISTOGRAMS[name][0]}', f'# TYPE {metric} histogram']
+            for bound, count in histogram.cumulative():
+                lines.append(f'{metric}_bucket{_format_labels(crawl + (("le", _format_bound(bound)),))} {count}')
+            lines.append(f'{metric}_sum{_format_labels(crawl)} {histogram.sum}')
+            lines.append(f'{metric}_count{_format_labels(crawl)} {histogram.count}')
+        for name, counter in self.counters.items():
+            metric = f'crawler_{name}'
+            lines += [f'# HELP {metric} {COUNTERS[name]}', f'# TYPE {metric} counter']
+            for labels, count in sorted(counter.items()):
+                lines.append(f'{metric}{_format_labels(crawl + labels)} {count}')
+
+        report = self.report()
+        gauges = [
+            ('last_run_timestamp_seconds', 'When the last crawl finished',
+             (self.finished_at or timezone.now()).timestamp()),
+            ('run_duration_seconds', 'Duration of the last crawl', report['duration_seconds']),
+            ('articles_per_second', 'Articles stored per second in the last crawl', report['articles_per_second'] or 0),
+        ]
+        for name, help_text, value in gauges:
+            lines += [f'# HELP crawler_{name} {help_text}', f'# TYPE crawler_{name} gauge',
+                      f'crawler_{name}{_format_labels(crawl)} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2))
+
+    def write_textfile(self, path):
+        # Written under a temporary name and renamed, so the collector never reads half a file
+        _write_atomic(path, self.prometheus())
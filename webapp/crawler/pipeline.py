@@ -0,0 +1,465 @@
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+
+from webapp.crawler.classify import DEFAULT_BATCH_SIZE, classify_titles, get_classification_cache
+from webapp.crawler.dedup import Story, StoryIndex, story_signature
+from webapp.crawler.extract import extract_article, extract_links, is_valid_image_url
+from webapp.crawler.feeds import canonical_link, parse_feed
+from webapp.crawler.fetch import DEFAULT_PER_HOST, DEFAULT_WORKERS, ValidatorCache, fetch, fetch_all
+from webapp.crawler.links import KnownLinks
+from webapp.crawler.metrics import CrawlMetrics
+from webapp.crawler.ratelimit import CircuitOpen
+from webapp.crawler.sections import FEED
+from webapp.crawler.store import ArticleWriter
+from webapp.crawler.thumbnails import ThumbnailMaker
+from webapp.section_cache import bump_version, warm_section_page
+
+DEFAULT_CHUNK_SIZE = 100
+STAGES = ['fetch', 'parse', 'dedup', 'classify', 'write', 'thumbnail']
+# How a section's article links are found: from its feeds, falling back to its page, or from its page only
+DISCOVERY_MODES = ['feeds', 'anchors']
+# Stages whose individual runs are also recorded in a histogram
+STAGE_HISTOGRAMS = {'parse': 'parse_seconds', 'classify': 'classify_seconds'}
+
+
+class Crawler:
+    """
+    Crawl one or more sections in a single pass.
+
+    Articles are found in each section's RSS/Atom feeds and news sitemaps
+    (`CRAWLER_FEEDS`, see `Section.feeds`), one request per feed instead of a whole section page, and
+    an article whose feed item carries a title, summary and image is stored
+    straight from it without fetching its page. The section page's anchors are
+    scraped instead when the section has no feed, none of them could be read, or
+    `discovery` is 'anchors'. The publish time a feed gives is stored alongside.
+    Feeds and section pages are fetched conditionally (see `ValidatorCache`)
+    unless `ignore_cache` or `refresh` is set.
+
+    Every section's links are collected first, so an article linked from several
+    sections (e.g. `home` and `news`) is fetched and parsed once and then stored in
+    each section's model. All sections share one fetch pool and the classifier.
+
+    Parsed articles are classified and written every `chunk_size` articles, so
+    memory stays flat on large crawls and a failure keeps the chunks already saved.
+
+    Before that, each article is checked against the `StoryIndex`. A near-duplicate
+    of a story stored under another link is, depending on `duplicates`, stored with
+    the original's category and hidden from the cross-section feed ('hide'), dropped
+    ('skip'), or treated like any other article ('keep'). Only stories whose
+    chunk was stored are added to the index.
+
+    Once everything is written, the images of the stored articles are downloaded
+    and turned into local thumbnails (see `ThumbnailMaker`), unless `thumbnails`
+    is off, and the pages of the sections that gained any are refreshed.
+
+    `timings` adds up the wall time spent in each of `STAGES`; fetch time is the
+    time the crawl was left waiting on the network, not the sum over workers.
+    `metrics` holds the latency histograms and outcome counters of the last crawl.
+    Requests are paced per host by the process-wide rate controller (see
+    `HostController`), with `per_host` as the most a host is sent at once. If a
+    host's circuit breaker opens, the crawl stops early like on `stop`.
+
+    With `quiet`, nothing is printed per article. Once the `stop` event is set, no
+    further articles are processed; what was already parsed is still written.
+    """
+
+    def __init__(self, stdout, stderr, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, refresh=False,
+                 ignore_cache=False, batch_size=DEFAULT_BATCH_SIZE, torch_threads=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 duplicates=None, quiet=False, thumbnails=True, stop=None, discovery=None):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.workers = workers
+        self.per_host = per_host
+        self.refresh = refresh
+        self.ignore_cache = ignore_cache
+        self.batch_size = batch_size
+        self.torch_threads = torch_threads
+        self.chunk_size = chunk_size
+        self.duplicates = settings.CRAWLER_DUPLICATE_POLICY if duplicates is None else duplicates
+        self.stories = StoryIndex() if self.duplicates != 'keep' else None
+        self.quiet = quiet
+        self.thumbnails = ThumbnailMaker(per_host=per_host, stderr=stderr) if thumbnails else None
+        self.images = {}  # Image URL of each stored article -> names of the sections showing it
+        self.stop = stop
+        self.index_caches = {}  # Section name -> ValidatorCache holding back the validators of its feeds or page
+        self.index_unsaved = {}  # Section name -> links listed in its feeds or page that it has yet to save
+        self.discovery = settings.CRAWLER_DISCOVERY if discovery is None else discovery
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.metrics = CrawlMetrics(None)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] += elapsed
+            if name in STAGE_HISTOGRAMS:
+                self.metrics.observe(STAGE_HISTOGRAMS[name], elapsed)
+
+    def record_response(self, response):
+        self.metrics.increment('http_responses_total', status=response.status_code)
+        self.metrics.observe('fetch_seconds', response.elapsed.total_seconds())
+
+    def record_retry(self, url, reason):
+        self.metrics.increment('retries_total', reason=reason)
+
+    def timed(self, name, iterable):
+        """Yield from `iterable`, counting the time spent waiting for each item towards stage `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    def discover(self, section):
+        """
+        The not-yet-stored articles of a section, as `{full URL: FeedItem or None}`.
+
+        The `FeedItem` is what the section's feeds said about the article; links
+        scraped from the section page have None.
+        """
+        cache = None if self.ignore_cache or self.refresh else ValidatorCache(section.name, deferred=True)
+        articles = self.discover_from_feeds(section, cache) if self.discovery == 'feeds' and section.feeds else None
+        source = 'feed'
+        if articles is None:
+            if cache:
+                cache.pending.clear()  # A feed without usable items must not be answered with a 304 next time
+            articles, source = dict.fromkeys(self.discover_from_page(section, cache)), 'page'
+        self.metrics.increment('discovered_total', len(articles), section=section.name, source=source)
+
+        # Drop links that are already stored before doing any network I/O
+        if not self.refresh:
+            known_links = KnownLinks.load(section.model, section.link_field)
+            new_articles = {url: item for url, item in articles.items() if url not in known_links}
+            self.metrics.increment('skipped_total', len(articles) - len(new_articles), section=section.name,
+                                   reason='stored')
+            if len(new_articles) < len(articles):
+                self.stdout.write(f"{len(articles) - len(new_articles)} {section.noun} already stored, skipping.")
+            articles = new_articles
+        if cache:
+            self.index_caches[section.name] = cache
+            self.index_unsaved[section.name] = set(articles)
+        return articles
+
+    def discover_from_page(self, section, cache=None):
+        """Full URLs of the articles linked from a section page; none if it is unchanged since the last run."""
+        try:
+            with self.stage('fetch'):
+                response = fetch(section.url, cache=cache, per_host=self.per_host, on_retry=self.record_retry,
+                                 stop=self.stop)
+            self.record_response(response)
+            response.raise_for_status()  # Raise an exception for HTTP errors
+        except requests.exceptions.RequestException as e:
+            self.metrics.increment('errors_total', stage='fetch')
+            self.stderr.write(f"Error fetching base URL {section.url}: {e}")
+            return []
+        if response.status_code == 304:
+            return []
+
+        with self.stage('parse'):
+            article_links = extract_links(response.content, section.article_selector)
+        return [f"{section.base_url}{relative_link}" for relative_link in article_links]
+
+    def discover_from_feeds(self, section, cache=None):
+        """
+        `{full URL: FeedItem}` of the section's articles listed in its feeds, or None
+        if no feed could be read or none lists an article of the section.
+
+        A sitemap index is followed to its first `CRAWLER_SITEMAP_MAX_CHILDREN`
+        sitemaps. Links on any of `CRAWLER_SITE_HOSTS` are rewritten onto
+        `CRAWLER_BASE_URL`, like the scraped anchors, and other links are dropped.
+
+        Feeds are fetched conditionally with `cache`, so an unchanged feed costs a
+        304 and yields no articles. Their validators are only saved once every
+        article they listed is stored (see `commit_indexes`), so a crawl that stops
+        early or fails to save some is not answered with a 304 next time.
+        """
+        articles = {}
+        usable = False
+        queue = [(url, True) for url in section.feeds]  # (feed URL, whether a sitemap index may be followed)
+        while queue:
+            feed_url, follow = queue.pop(0)
+            try:
+                with self.stage('fetch'):
+                    response = fetch(feed_url, cache=cache, per_host=self.per_host, on_retry=self.record_retry,
+                                     stop=self.stop)
+                self.record_response(response)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                self.metrics.increment('errors_total', stage='feed')
+                self.stderr.write(f"Error fetching feed {feed_url}: {e}")
+                continue
+            if response.status_code == 304:
+                usable = True  # Nothing new since the last run
+                continue
+
+            with self.stage('parse'):
+                items, sitemaps = parse_feed(response.content)
+            if follow and sitemaps:
+                queue[:0] = [(url, False) for url in sitemaps[:settings.CRAWLER_SITEMAP_MAX_CHILDREN]]
+                if cache:
+                    # An index keeps listing the same sitemaps while their contents change
+                    cache.pending.pop(feed_url, None)
+            for item in items:
+                link = canonical_link(item.link, section.base_url, settings.CRAWLER_SITE_HOSTS, section.link_prefix)
+                if link is None:
+                    continue
+                usable = True
+                # The same article in two feeds: the fuller item wins
+                if link not in articles or (item.complete and not articles[link].complete):
+                    item.link = link
+                    articles[link] = item
+
+        if not usable:
+            if section.feeds:
+                self.stderr.write(f"No usable feed for {section}; scraping {section.url} instead.")
+            return None
+        return articles
+
+    def commit_indexes(self):
+        """Save the validators of each section's feeds or page if every new article they listed is now stored."""
+        for name in self.index_caches:
+            if not self.index_unsaved.get(name):
+                self.commit_index(name)
+
+    def commit_index(self, name):
+        cache = self.index_caches[name]
+        for url in list(cache.pending):
+            cache.commit(url)
+
+    def article_saved(self, section, links):
+        """
+        Write the validators of the section's feeds or page once all they listed is stored.
+
+        It runs when the rows are committed, which inside an outer transaction is
+        only after the crawl has returned.
+        """
+        unsaved = self.index_unsaved.get(section.name)
+        if unsaved:
+            unsaved.difference_update(links)
+            if not unsaved:
+                self.commit_index(section.name)
+
+    def crawl(self, sections):
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.metrics = CrawlMetrics('+'.join(section.name for section in sections))
+        self.images = {}
+        self.index_caches, self.index_unsaved = {}, {}
+        wanted = {}  # article URL -> sections that want it
+        from_feeds = {}  # article URL -> feed item complete enough to store without fetching the page
+        published = {}  # article URL -> when its feed says it was published
+        for section in sections:
+            for url, item in self.discover(section).items():
+                wanted.setdefault(url, []).append(section)
+                if item is not None and item.complete:
+                    from_feeds.setdefault(url, item)
+                if item is not None and item.published_at:
+                    published.setdefault(url, item.published_at)
+
+        writers = {
+            section.name: ArticleWriter(section, update=self.refresh, stderr=self.stderr, on_saved=self.article_saved)
+            for section in sections
+        }
+        pending = []  # (section, article) pairs waiting to be classified and saved
+
+        for url, item in from_feeds.items():
+            for section in wanted[url]:
+                image_url = item.image_url
+                if section.filter_placeholders and not is_valid_image_url(image_url):
+                    image_url = None
+                pending.append((section, section.build(item.title, url, image_url, item.summary, item.published_at)))
+            if len(pending) >= self.chunk_size:
+                self.flush(pending, writers)
+                pending = []
+
+        to_fetch = [url for url in wanted if url not in from_feeds]
+        # Fetch articles concurrently and process each one as it arrives
+        fetched_all = fetch_all(to_fetch, workers=self.workers, per_host=self.per_host, on_retry=self.record_retry,
+                                stop=self.stop)
+        for url, fetched in self.timed('fetch', fetched_all):
+            if self.stop is not None and self.stop.is_set():
+                fetched_all.close()
+                self.stderr.write("Stopping early; saving the articles parsed so far.")
+                break
+            try:
+                article_response = fetched.result()
+                self.record_response(article_response)
+                article_response.raise_for_status()
+            except CircuitOpen as e:
+                self.metrics.increment('errors_total', stage='circuit')
+                fetched_all.close()
+                self.stderr.write(f"Stopping early, {urlsplit(url).netloc} is failing ({e}); "
+                                  f"saving the articles parsed so far.")
+                break
+            except requests.exceptions.RequestException as e:
+                self.metrics.increment('errors_total', stage='fetch')
+                self.stderr.write(f"Error fetching article URL {url}: {e}")
+                continue
+            # The page is parsed once per distinct extraction rule, not once per section
+            extracted = {}
+            for section in wanted[url]:
+                options = (section.image_attrs, section.filter_placeholders)
+                if options not in extracted:
+                    with self.stage('parse'):
+                        extracted[options] = extract_article(
+                            article_response.content, section.base_url,
+                            image_attrs=section.image_attrs, filter_placeholders=section.filter_placeholders,
+                        )
+                title, image_url, summary = extracted[options]
+                pending.append((section, section.build(title, url, image_url, summary, published.get(url))))
+
+                # Debug: Print the extracted image URL
+                if not self.quiet:
+                    self.stdout.write(section.image_message(image_url, url))
+
+            if len(pending) >= self.chunk_size:
+                self.flush(pending, writers)
+                pending = []
+        self.flush(pending, writers)
+        with self.stage('classify'):
+            get_classification_cache().prune()
+        self.commit_indexes()
+        refreshed = self.make_thumbnails()
+
+        for section in sections:
+            self.report(writers[section.name])
+            if writers[section.name].saved or section.name in refreshed:
+                self.warm(section)
+        if refreshed or any(writer.saved for writer in writers.values()):
+            self.warm(FEED)
+        self.record_totals(writers)
+
+    def make_thumbnails(self):
+        """Make the missing thumbnails of this crawl's images; return the names of the sections that gained any."""
+        if not self.thumbnails or not self.images or (self.stop is not None and self.stop.is_set()):
+            return set()  # Left for `make_thumbnails` when shutting down
+        try:
+            with self.stage('thumbnail'):
+                outcomes = self.thumbnails.make(list(self.images))
+        except Exception as e:
+            # The articles are already stored; their thumbnails are made on a later run or by make_thumbnails
+            self.metrics.increment('errors_total', stage='thumbnail')
+            self.stderr.write(f"Error making thumbnails: {e}")
+            return set()
+        for status, urls in outcomes.items():
+            self.metrics.increment('thumbnails_total', len(urls), outcome=status)
+        if outcomes:
+            self.stdout.write(f"Thumbnails: {self.thumbnails.summary(outcomes)}.")
+        refreshed = {name for url in outcomes.get('ok', []) for name in self.images[url]}
+        # The pages were cached with the original images when the articles were written
+        for name in refreshed | ({FEED.name} if refreshed else set()):
+            bump_version(name)
+        return refreshed
+
+    def record_totals(self, writers):
+        for name, writer in writers.items():
+            for outcome in ['inserted', 'updated', 'skipped', 'failed', 'duplicates']:
+                self.metrics.increment('articles_total', getattr(writer, outcome), section=name, outcome=outcome)
+            self.metrics.increment('errors_total', writer.failed, stage='write')
+        for stage, seconds in self.timings.items():
+            self.metrics.increment('stage_seconds_total', seconds, stage=stage)
+        self.metrics.finish()
+
+    def flush(self, pending, writers):
+        """Classify and save a chunk of articles, section by section."""
+        if not pending:
+            return
+        with self.stage('dedup'):
+            new_stories, copies = self.deduplicate(pending) if self.stories else ({}, [])
+        copied = {id(article) for _, article, _ in copies}
+        originals = [(section, article) for section, article in pending if id(article) not in copied]
+        with self.stage('classify'):
+            self.classify(originals)
+        for story, (section, article) in new_stories.items():
+            story.category = getattr(article, section.category_field)
+
+        by_section = {}
+        for section, article in originals:
+            by_section.setdefault(section.name, []).append(article)
+        hidden = {}  # section name -> links of the copies stored in it but kept out of the feed
+        for section, article, story in copies:
+            writers[section.name].duplicates += 1
+            if self.duplicates == 'skip':
+                # Dropped on purpose, so it does not hold back the validators of the feed that listed it
+                self.article_saved(section, [getattr(article, section.link_field)])
+            if self.duplicates == 'hide':
+                setattr(article, section.category_field, story.category)
+                by_section.setdefault(section.name, []).append(article)
+                hidden.setdefault(section.name, set()).add(getattr(article, section.link_field))
+        with self.stage('write'):
+            stored = set()  # Links of the chunks that were written
+            for name, articles in by_section.items():
+                if not writers[name].write(articles, duplicates=hidden.get(name, ())):
+                    continue
+                section = writers[name].section
+                for article in articles:
+                    stored.add(getattr(article, section.link_field))
+                    if getattr(article, section.image_field):
+                        self.images.setdefault(getattr(article, section.image_field), set()).add(name)
+            # A story whose chunk failed is left out, so it is not taken as the original of the next retelling
+            new_stories = [story for story in new_stories if story.link in stored]
+            if new_stories:
+                self.stories.add(new_stories)
+
+    def deduplicate(self, pending):
+        """
+        Find the articles of a chunk that retell a story already stored, or seen earlier in the chunk.
+
+        Returns `(new_stories, copies)`: a `{Story: (section, article)}` dict of first
+        sightings, to be added to the index once classified, and a list of
+        `(section, article, original Story)` for the near-duplicates.
+        """
+        signatures = [
+            story_signature(getattr(article, section.title_field), getattr(article, section.summary_field))
+            for section, article in pending
+        ]
+        known = self.stories.candidates([signature for signature in signatures if signature])
+        new_stories, copies = {}, []
+        for (section, article), signature in zip(pending, signatures):
+            if signature is None:
+                continue
+            link = getattr(article, section.link_field)
+            original = self.stories.find(signature, link, known + list(new_stories))
+            if original is None:
+                if all(story.link != link for story in new_stories):  # The same link in a second section
+                    new_stories[Story(link, signature)] = (section, article)
+            else:
+                copies.append((section, article, original))
+        return new_stories, copies
+
+    def classify(self, pending):
+        """Classify a chunk's titles in batches; cached titles skip the model."""
+        categories = classify_titles(
+            [getattr(article, section.title_field) for section, article in pending],
+            batch_size=self.batch_size,
+            threads=self.torch_threads,
+            on_error=self.classification_error,
+            cache=get_classification_cache(),
+        )
+        for (section, article), category in zip(pending, categories):
+            setattr(article, section.category_field, category)
+
+    def classification_error(self, e):
+        self.metrics.increment('errors_total', stage='classify')
+        self.stderr.write(f"Error in classification: {e}")
+
+    def warm(self, section):
+        try:
+            warm_section_page(section.name)
+        except Exception as e:
+            self.stderr.write(f"Error warming the {section} page cache: {e}")
+
+    def report(self, writer):
+        section = writer.section
+        if writer.saved or writer.skipped or writer.failed or writer.duplicates:
+            self.stdout.write(f"{writer.saved} {section.noun} scraped and saved ({writer.summary()}).")
+        else:
+            self.stdout.write(f"No {section.noun} were scraped.")
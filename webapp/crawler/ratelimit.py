@@ -0,0 +1,226 @@
+import random
+import threading
+import time
+from collections import deque
+from datetime import timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+# Responses that are worth retrying after a pause
+RETRY_STATUSES = {429, 502, 503, 504}
+# Responses that mean the host wants fewer requests
+THROTTLE_STATUSES = {429, 503}
+# Multiplicative decrease of the concurrency limit on a congestion signal
+DECREASE = 0.5
+# Smoothing of the latency average; higher reacts faster
+LATENCY_WEIGHT = 0.2
+# Below this average latency, in seconds, a host is never considered slow
+MIN_SLOW_LATENCY = 0.05
+# Recent latencies the baseline (the fastest of them) is taken from
+BASELINE_SAMPLES = 200
+# Failures needed in the breaker window before it may open
+BREAKER_MIN_FAILURES = 5
+# Longest a waiting request goes without checking whether the crawl is stopping, in seconds
+WAIT_SLICE = 0.5
+
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """A host failed too often recently; requests to it are refused until its cooldown ends."""
+
+
+class Stopped(requests.exceptions.RequestException):
+    """The crawl is stopping; the request was not sent."""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a `Retry-After` header (delay or HTTP date), or None if absent or unreadable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt_timezone.utc)
+    return max((when - timezone.now()).total_seconds(), 0.0)
+
+
+def backoff(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff: a random pause of up to `base * 2**attempt` seconds, at most `cap`."""
+    base = settings.CRAWLER_BACKOFF_BASE if base is None else base
+    cap = settings.CRAWLER_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class HostController:
+    """
+    AIMD concurrency limit and circuit breaker for one host.
+
+    The number of requests allowed in flight grows by about one for every
+    `limit` successful responses and halves on a congestion signal: a 429/503,
+    a failure (5xx, timeout, connection error) or an average latency more than
+    `CRAWLER_LATENCY_TOLERANCE` times the host's recent best. It is cut at most
+    once per average round trip, so one burst of errors counts once. A
+    `Retry-After` pauses every request to the host until it has passed, for at
+    most `CRAWLER_BACKOFF_MAX` seconds.
+
+    When at least half (`CRAWLER_BREAKER_THRESHOLD`) of the last
+    `CRAWLER_BREAKER_WINDOW` responses failed, the breaker opens and requests
+    are refused with `CircuitOpen` for `CRAWLER_BREAKER_COOLDOWN` seconds. One
+    probe request is then let through; its outcome closes or reopens it.
+    """
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = max(min_limit, self.max_limit / 2)
+        self.in_flight = 0
+        self.latency = None  # Smoothed latency, in seconds
+        self.recent_latencies = deque(maxlen=BASELINE_SAMPLES)
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.outcomes = deque(maxlen=settings.CRAWLER_BREAKER_WINDOW)  # True for each failure
+        self.open_until = None  # Set while the breaker is open
+        self.probing = False
+        self._condition = threading.Condition()
+
+    @property
+    def baseline(self):
+        return min(self.recent_latencies) if self.recent_latencies else None
+
+    def acquire(self, stop=None):
+        """
+        Wait for a free slot under the limit; raise `CircuitOpen` while the breaker
+        refuses requests, or `Stopped` once the `stop` event is set.
+        """
+        with self._condition:
+            while True:
+                if stop is not None and stop.is_set():
+                    raise Stopped("The crawl is stopping")
+                now = time.monotonic()
+                if self.open_until is not None:
+                    if now < self.open_until or self.probing:
+                        raise CircuitOpen("Host is failing; requests are paused until its cooldown ends")
+                    self.probing = True  # Half-open: this request is the probe
+                    self.in_flight += 1
+                    return
+                if now < self.paused_until:
+                    self._condition.wait(min(self.paused_until - now, WAIT_SLICE))
+                elif self.in_flight >= int(self.limit):
+                    self._condition.wait(WAIT_SLICE)
+                else:
+                    self.in_flight += 1
+                    return
+
+    def release(self, status=None, latency=None, retry_after=None):
+        """Record the outcome of a request: its HTTP `status`, or None if it failed without a response."""
+        with self._condition:
+            now = time.monotonic()
+            self.in_flight -= 1
+            failed = status is None or status >= 500
+            throttled = status in THROTTLE_STATUSES
+            slow = False
+            # Refusals come back fast and would make the host look quicker than it is
+            if latency is not None and not failed and not throttled:
+                self.recent_latencies.append(latency)
+                self.latency = latency if self.latency is None else (
+                    LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * self.latency
+                )
+                slow = (self.latency > MIN_SLOW_LATENCY
+                        and self.latency > self.baseline * settings.CRAWLER_LATENCY_TOLERANCE)
+
+            if failed or throttled or slow:
+                if now - self.last_decrease > (self.latency or 0.0):
+                    self.limit = max(self.min_limit, self.limit * DECREASE)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if retry_after:
+                # A host asking for an hour's pause is treated like any other throttling, not obeyed to the letter
+                pause = min(retry_after, settings.CRAWLER_BACKOFF_MAX)
+                self.paused_until = max(self.paused_until, now + pause)
+
+            self.record_outcome(failed, now)
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Give back a slot without recording an outcome."""
+        with self._condition:
+            self.in_flight -= 1
+            self.probing = False
+            self._condition.notify_all()
+
+    def record_outcome(self, failed, now):
+        if self.probing:
+            self.probing = False
+            if failed:
+                self.open_until = now + settings.CRAWLER_BREAKER_COOLDOWN
+                return
+            self.open_until = None
+            self.outcomes.clear()
+        self.outcomes.append(failed)
+        failures = sum(self.outcomes)
+        if (failures >= BREAKER_MIN_FAILURES and len(self.outcomes) == self.outcomes.maxlen
+                and failures / len(self.outcomes) >= settings.CRAWLER_BREAKER_THRESHOLD):
+            self.open_until = now + settings.CRAWLER_BREAKER_COOLDOWN
+            self.outcomes.clear()
+
+    @property
+    def is_open(self):
+        return self.open_until is not None
+
+    def state(self):
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'latency': self.latency,
+            'baseline': self.baseline,
+            'open': self.is_open,
+        }
+
+
+class RateController:
+    """The `HostController` of every host, created on first use with at most `per_host` requests in flight."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def host(self, url, per_host):
+        name = urlsplit(url).netloc
+        with self._lock:
+            if name not in self._hosts:
+                self._hosts[name] = HostController(per_host)
+            controller = self._hosts[name]
+            # A later crawl may allow more or fewer requests per host; the learned limit is kept within it
+            controller.max_limit = max(controller.min_limit, per_host)
+            controller.limit = min(controller.limit, controller.max_limit)
+            return controller
+
+    def state(self):
+        with self._lock:
+            return {name: controller.state() for name, controller in self._hosts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_rate_controller():
+    """Return the process-wide `RateController`, shared like the HTTP session by every crawl in the process."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = RateController()
+        return _controller
@@ -0,0 +1,139 @@
+from django.conf import settings
+
+from webapp.models import (
+    BusinessArticle,
+    FeedEntry,
+    HomeArticle,
+    InnovationArticle,
+    NewsArticle,
+    SportsArticle,
+    TravelArticle,
+)
+
+
+class Section:
+    """
+    Where a site section lives and how its articles map onto its model.
+
+    The section models predate this class and prefix every column with the section
+    name (`news_title`, `sports_link`, ...); `build()` hides that from the crawler.
+    """
+
+    def __init__(self, name, model, prefix, path, link_prefix, noun, timestamp_field,
+                 filter_placeholders=False, image_attrs=('data-src', 'src')):
+        self.name = name
+        self.model = model
+        self.path = path
+        self.link_prefix = link_prefix  # Path every article link of the section starts with
+        self.noun = noun  # e.g. "news articles", used in progress messages
+        self.filter_placeholders = filter_placeholders
+        self.image_attrs = image_attrs
+        self.title_field = f'{prefix}title'
+        self.link_field = f'{prefix}link'
+        self.image_field = f'{prefix}image_url'
+        self.category_field = f'{prefix}category'
+        self.summary_field = f'{prefix}summary'
+        self.source_published_field = f'{prefix}source_published_at'  # When the site published it, from its feed
+        self.timestamp_field = timestamp_field  # When the row was stored; the list views page on it
+
+    @property
+    def base_url(self):
+        """The site being crawled; the benchmarks point it at a local stand-in."""
+        return settings.CRAWLER_BASE_URL
+
+    @property
+    def url(self):
+        return f'{self.base_url}{self.path}'
+
+    @property
+    def article_selector(self):
+        """Anchors of the section page that link to its articles, for when there is no usable feed."""
+        return f'a[href^="{self.link_prefix}"]'
+
+    @property
+    def feeds(self):
+        """URLs of the section's RSS/Atom feeds and news sitemaps; paths are resolved against `base_url`."""
+        return [url if '://' in url else f'{self.base_url}{url}' for url in settings.CRAWLER_FEEDS.get(self.name, [])]
+
+    @property
+    def public_fields(self):
+        """Section-independent field names mapped to this model's columns."""
+        return {
+            'id': 'id',
+            'title': self.title_field,
+            'link': self.link_field,
+            'image_url': self.image_field,
+            'category': self.category_field,
+            'summary': self.summary_field,
+            'published_at': self.timestamp_field,
+            'source_published_at': self.source_published_field,
+        }
+
+    def __str__(self):
+        return self.name
+
+    def build(self, title, link, image_url, summary, source_published_at=None):
+        return self.model(**{
+            self.title_field: title,
+            self.link_field: link,
+            self.image_field: image_url if image_url else None,
+            self.summary_field: summary,
+            self.source_published_field: source_published_at,
+        })
+
+    def image_message(self, image_url, link):
+        """The line the section's original command printed for each article's image."""
+        if self.name == 'home':
+            return f"Image URL: {image_url if image_url else 'No image found'}"
+        return f"Image Found: {image_url}" if image_url else f"No image found for {link}"
+
+    def feed_entry(self, article):
+        """The `FeedEntry` mirroring a stored article of this section."""
+        return FeedEntry(
+            section=self.name,
+            title=getattr(article, self.title_field),
+            link=getattr(article, self.link_field),
+            image_url=getattr(article, self.image_field),
+            category=getattr(article, self.category_field),
+            summary=getattr(article, self.summary_field),
+            published_at=getattr(article, self.timestamp_field),
+            source_published_at=getattr(article, self.source_published_field),
+        )
+
+
+class Feed:
+    """
+    The cross-section `FeedEntry` table, shaped like a `Section` for the views and the API.
+
+    Every section's articles are copied into it as they are stored, so "latest across
+    everything" is one range scan over `(published_at, id)` instead of six queries.
+    """
+
+    name = 'latest'
+    model = FeedEntry
+    timestamp_field = 'published_at'
+    public_fields = {name: name for name in
+                     ['id', 'section', 'title', 'link', 'image_url', 'category', 'summary', 'published_at',
+                      'source_published_at']}
+
+    def __str__(self):
+        return self.name
+
+
+FEED = Feed()
+
+
+SECTIONS = {section.name: section for section in [
+    Section('home', HomeArticle, '', '/', '/news', 'articles', 'published_at',
+            filter_placeholders=True, image_attrs=('data-src', 'src', 'srcset')),
+    Section('news', NewsArticle, 'news_', '/news', '/news', 'news articles', 'scraped_at',
+            filter_placeholders=True),
+    Section('sports', SportsArticle, 'sports_', '/sport', '/sport', 'sports articles',
+            'date_created'),
+    Section('business', BusinessArticle, 'business_', '/business', '/business',
+            'business articles', 'business_published_at'),
+    Section('innovations', InnovationArticle, 'innovation_', '/innovation',
+            '/innovation', 'innovation articles', 'innovation_created_at'),
+    Section('travel', TravelArticle, 'travel_', '/travel', '/travel', 'travel articles',
+            'travel_created_at', filter_placeholders=True),
+]}
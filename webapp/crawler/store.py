@@ -0,0 +1,112 @@
+from django.db import DatabaseError, transaction
+
+from webapp.crawler.sections import FEED
+from webapp.models import FeedEntry
+from webapp.section_cache import bump_version
+
+
+class ArticleWriter:
+    """
+    Writes one section's articles to its model a chunk at a time.
+
+    Each chunk is committed in its own transaction, so a failure only loses that
+    chunk. Links that are already stored are skipped, or updated in place when
+    `update` is set (as with `--refresh`), instead of failing the whole insert.
+    Every chunk that changes rows bumps the section's page-cache version.
+
+    Each change is mirrored into the cross-section `FeedEntry` table in the same
+    transaction, so the feed never shows an article its section does not have.
+    Near-duplicates of stories stored under another link are left out of it, so
+    the feed shows each story once.
+
+    `on_saved(section, links)` is called once a chunk has committed, with the
+    links of that chunk now stored, whether inserted, updated or already there.
+    `write` itself returns whether the chunk was stored.
+    """
+
+    def __init__(self, section, update=False, stderr=None, on_saved=None):
+        self.section = section
+        self.update = update
+        self.stderr = stderr
+        self.on_saved = on_saved
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.duplicates = 0  # Near-duplicates of stored stories, whether written or not
+
+    @property
+    def saved(self):
+        return self.inserted + self.updated
+
+    def write(self, articles, duplicates=()):
+        section = self.section
+        link_field = section.link_field
+
+        # Keep the first copy of any link repeated inside the chunk
+        by_link = {}
+        for article in articles:
+            by_link.setdefault(getattr(article, link_field), article)
+        self.skipped += len(articles) - len(by_link)
+
+        try:
+            with transaction.atomic():
+                existing = dict(
+                    section.model.objects
+                    .filter(**{f'{link_field}__in': list(by_link)})
+                    .values_list(link_field, 'pk')
+                )
+                new = [article for link, article in by_link.items() if link not in existing]
+                section.model.objects.bulk_create(new, ignore_conflicts=True)
+                # bulk_create() has filled in each article's timestamp, so the feed copies it as-is
+                FeedEntry.objects.bulk_create([
+                    section.feed_entry(article) for article in new if getattr(article, link_field) not in duplicates
+                ], ignore_conflicts=True)
+
+                if self.update and existing:
+                    stale = []
+                    for link, pk in existing.items():
+                        article = by_link[link]
+                        article.pk = pk
+                        stale.append(article)
+                    section.model.objects.bulk_update(stale, [
+                        section.title_field, section.image_field, section.category_field, section.summary_field,
+                        section.source_published_field,
+                    ])
+                    self.update_feed(stale)
+                    self.updated += len(stale)
+                else:
+                    self.skipped += len(existing)
+                self.inserted += len(new)
+                if new or (self.update and existing):
+                    # Cached pages of this section go stale the moment the chunk commits
+                    transaction.on_commit(lambda: bump_version(section.name))
+                    transaction.on_commit(lambda: bump_version(FEED.name))
+                if self.on_saved:
+                    transaction.on_commit(lambda: self.on_saved(section, list(by_link)))
+        except DatabaseError as e:
+            self.failed += len(by_link)
+            if self.stderr:
+                self.stderr.write(f"Error saving {len(by_link)} {section.noun}: {e}")
+            return False
+        return True
+
+    def update_feed(self, articles):
+        """Copy refreshed titles, images, categories, summaries and publish times onto the matching feed entries."""
+        section = self.section
+        by_link = {getattr(article, section.link_field): section.feed_entry(article) for article in articles}
+        entries = FeedEntry.objects.filter(section=section.name, link__in=list(by_link)).values_list('link', 'pk')
+        stale = []
+        for link, pk in entries:
+            entry = by_link[link]
+            entry.pk = pk
+            stale.append(entry)
+        FeedEntry.objects.bulk_update(stale, ['title', 'image_url', 'category', 'summary', 'source_published_at'])
+
+    def summary(self):
+        counts = f"{self.inserted} inserted, {self.updated} updated, {self.skipped} skipped"
+        if self.duplicates:
+            counts += f", {self.duplicates} near-duplicates"
+        if self.failed:
+            counts += f", {self.failed} failed"
+        return counts
@@ -0,0 +1,190 @@
+import hashlib
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from webapp.crawler.fetch import DEFAULT_PER_HOST, DEFAULT_TIMEOUT, fetch, get_session
+from webapp.crawler.ratelimit import CircuitOpen, Stopped
+from webapp.models import Thumbnail
+
+# Formats accepted from the site; anything else (SVG, an HTML error page served as an image, ...) is rejected
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+# File extension -> Pillow format and save options of each stored thumbnail
+OUTPUTS = {
+    'webp': ('WEBP', {'quality': 75, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+# Greyscale range below which an image is taken for a blank placeholder
+MIN_CONTRAST = 8
+# Image URLs looked up per query, well below the bound-parameter limits of SQLite and PostgreSQL
+LOOKUP_CHUNK = 500
+
+
+class InvalidImage(Exception):
+    """The downloaded file is not an image worth showing."""
+
+
+def download(url, max_bytes, timeout=DEFAULT_TIMEOUT, per_host=DEFAULT_PER_HOST):
+    """The body of `url`, refusing anything that is not served as an image or is larger than `max_bytes`."""
+    with fetch(url, timeout=timeout, per_host=per_host, stream=True) as response:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        if content_type and not content_type.startswith('image/'):
+            raise InvalidImage(f"served as {content_type}")
+        try:
+            length = int(response.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = 0  # Unknown; the body is still cut off at `max_bytes` below
+        if length > max_bytes:
+            raise InvalidImage(f"larger than {max_bytes} bytes")
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > max_bytes:
+                raise InvalidImage(f"larger than {max_bytes} bytes")
+        return bytes(data)
+
+
+def open_image(data, min_size):
+    """Decode `data`, checking it is a whole image of an accepted format and at least `min_size` on each side."""
+    try:
+        with warnings.catch_warnings():
+            # Pillow only warns about images big enough to be decompression bombs
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            Image.open(BytesIO(data)).verify()  # Checks the file's structure without decoding it
+            image = Image.open(BytesIO(data))
+            image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError,
+            Image.DecompressionBombWarning, Image.DecompressionBombError) as e:
+        raise InvalidImage(f"not a readable image ({type(e).__name__})") from e
+    if image.format not in ACCEPTED_FORMATS:
+        raise InvalidImage(f"unsupported format {image.format}")
+    if min(image.size) < min_size:
+        raise InvalidImage(f"{image.width}x{image.height} is too small")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        # Transparent areas become white, as on the cards the thumbnails are shown on
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, 'white')
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    sample = image.copy()
+    sample.thumbnail((64, 64))
+    low, high = sample.convert('L').getextrema()
+    if high - low < MIN_CONTRAST:
+        raise InvalidImage("blank placeholder")
+    return image
+
+
+def store_thumbnails(image, digest, widths):
+    """Save `image` at each of `widths` (never upscaled) in every format of `OUTPUTS`; return the widths stored."""
+    stored = []
+    for width in sorted(set(min(width, image.width) for width in widths)):
+        resized = image if width == image.width else image.resize(
+            (width, max(1, round(image.height * width / image.width))), Image.LANCZOS,
+        )
+        for extension, (image_format, options) in OUTPUTS.items():
+            name = Thumbnail.file_name(digest, width, extension)
+            if default_storage.exists(name):
+                continue  # The same original, linked from another URL
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        stored.append(width)
+    return stored
+
+
+class ThumbnailMaker:
+    """
+    Downloads article images once and stores resized thumbnails of them.
+
+    Each image is downloaded with `fetch()`, on at most `workers` threads and
+    paced, retried and cut off per host like the article pages, with at most
+    `per_host` requests to a host at once. It is checked before use:
+    it must be served as an image of at most `THUMBNAIL_MAX_BYTES`, decode as a
+    whole JPEG/PNG/WebP/GIF, be at least `THUMBNAIL_MIN_SIZE` on each side (smaller
+    ones are placeholders and icons) and not be blank.
+    Every `THUMBNAIL_WIDTHS` width is stored as WebP and JPEG under
+    MEDIA_ROOT/thumbs, named by the sha256 of the original, so the files can be
+    cached forever and an image linked under several URLs is stored once.
+
+    The outcome for each URL is kept in a `Thumbnail` row. Invalid images are not
+    tried again; failed downloads are, up to `THUMBNAIL_MAX_ATTEMPTS` times.
+    Downloads refused because the host's circuit breaker is open or the crawl is
+    stopping are 'skipped': they were never sent, so no row or attempt is recorded.
+    """
+
+    def __init__(self, workers=None, per_host=DEFAULT_PER_HOST, widths=None, stderr=None):
+        self.workers = workers or settings.THUMBNAIL_WORKERS
+        self.per_host = per_host
+        self.widths = widths or settings.THUMBNAIL_WIDTHS
+        self.stderr = stderr
+
+    def pending(self, urls):
+        """The URLs among `urls` still waiting for thumbnails."""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        done = set()
+        for start in range(0, len(urls), LOOKUP_CHUNK):
+            done.update(
+                Thumbnail.objects.filter(source_url__in=urls[start:start + LOOKUP_CHUNK])
+                .filter(~Q(status='failed') | Q(attempts__gte=settings.THUMBNAIL_MAX_ATTEMPTS))
+                .values_list('source_url', flat=True)
+            )
+        return [url for url in urls if url not in done]
+
+    def process(self, url):
+        """`(status, fields)` of the `Thumbnail` row for `url`."""
+        try:
+            data = download(url, settings.THUMBNAIL_MAX_BYTES, per_host=self.per_host)
+            image = open_image(data, settings.THUMBNAIL_MIN_SIZE)
+            digest = hashlib.sha256(data).hexdigest()
+            widths = store_thumbnails(image, digest, self.widths)
+        except InvalidImage as e:
+            return 'invalid', {'error': str(e)[:255]}
+        except (CircuitOpen, Stopped) as e:
+            return 'skipped', {'error': str(e)[:255]}
+        except (requests.exceptions.RequestException, OSError) as e:
+            return 'failed', {'error': str(e)[:255]}
+        except Exception as e:
+            # One bad image must not take the others down with it
+            return 'failed', {'error': f"{type(e).__name__}: {e}"[:255]}
+        return 'ok', {'digest': digest, 'widths': widths, 'width': image.width, 'height': image.height, 'error': ''}
+
+    def make(self, urls):
+        """Make the thumbnails of `urls` that are still missing; return `{outcome: [url, ...]}`."""
+        outcomes = {}
+        urls = self.pending(urls)
+        if not urls:
+            return outcomes
+        get_session(pool_size=self.workers)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            futures = {executor.submit(self.process, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures.pop(future)
+                status, fields = future.result()
+                outcomes.setdefault(status, []).append(url)
+                if status == 'skipped':
+                    continue  # Tried again on the next run, without using up an attempt
+                thumbnail, _ = Thumbnail.objects.get_or_create(source_url=url, defaults={'status': status})
+                thumbnail.status = status
+                thumbnail.attempts += 1
+                for name, value in fields.items():
+                    setattr(thumbnail, name, value)
+                thumbnail.save()
+                if status != 'ok' and self.stderr:
+                    self.stderr.write(f"No thumbnail for {url}: {fields['error']}")
+        return outcomes
+
+    def summary(self, outcomes):
+        counts = Counter({status: len(urls) for status, urls in outcomes.items()})
+        return ', '.join(f"{counts[status]} {status}" for status in ['ok', 'invalid', 'failed', 'skipped']
+                         if counts[status])
@@ -0,0 +1,169 @@
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command, load_command_class
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from webapp.benchmarks.classifier import StubClassifier
+from webapp.benchmarks.server import StandInSite, feed_path
+from webapp.crawler.classify import get_classification_cache, set_classifier
+from webapp.crawler.pipeline import DISCOVERY_MODES
+from webapp.crawler.ratelimit import get_rate_controller
+from webapp.crawler.sections import SECTIONS
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# The scraper commands, in the order they are benchmarked
+COMMANDS = ['home', 'news', 'sports', 'business', 'innovations', 'travel', 'crawl_all']
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the scraper commands against a local stand-in for the BBC site and '
+            'report throughput, per-stage time and peak memory as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('commands', nargs='*', metavar='command',
+                            help=f"Commands to benchmark (default: all of {', '.join(COMMANDS)})")
+        parser.add_argument('--articles', type=int, default=40, help='Articles linked from each section page')
+        parser.add_argument('--latency', type=float, default=50, help='Stand-in response delay, in milliseconds')
+        parser.add_argument('--jitter', type=float, default=20,
+                            help='Extra random delay of up to this many milliseconds per response')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of article requests the stand-in fails with a 500')
+        parser.add_argument('--capacity', type=int, default=None,
+                            help='Requests the stand-in serves at once before answering 429 (default: unlimited)')
+        parser.add_argument('--retry-after', type=int, default=1,
+                            help='Retry-After seconds the stand-in sends with a 429')
+        parser.add_argument('--overload-latency', type=float, default=0,
+                            help='Milliseconds added per request in flight beyond half the capacity')
+        parser.add_argument('--throttle-rate', type=float, default=0.0,
+                            help='Fraction of article requests the stand-in answers 429 regardless of load')
+        parser.add_argument('--discovery', choices=DISCOVERY_MODES, default=settings.CRAWLER_DISCOVERY,
+                            help="Passed on to each command: read the stand-in's section feeds, or scrape its pages")
+        parser.add_argument('--feed-image-rate', type=float, default=0.75,
+                            help='Fraction of feed items that carry an image and need not be fetched')
+        parser.add_argument('--classify-delay', type=float, default=0.0,
+                            help='Milliseconds the stub classifier spends per title')
+        parser.add_argument('--real-classifier', action='store_true',
+                            help='Classify with the real transformers model instead of the stub')
+        parser.add_argument('--workers', type=int, default=None, help='Passed on to each command')
+        parser.add_argument('--per-host', type=int, default=None, help='Passed on to each command')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the generated pages and injected faults')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of standard output')
+
+    def handle(self, *args, **kwargs):
+        names = kwargs['commands'] or COMMANDS
+        unknown = [name for name in names if name not in COMMANDS]
+        if unknown:
+            raise CommandError(f"Unknown command(s): {', '.join(unknown)}")
+
+        site = StandInSite(
+            articles_per_section=kwargs['articles'],
+            latency=kwargs['latency'] / 1000,
+            jitter=kwargs['jitter'] / 1000,
+            error_rate=kwargs['error_rate'],
+            seed=kwargs['seed'],
+            capacity=kwargs['capacity'],
+            retry_after=kwargs['retry_after'],
+            overload_latency=kwargs['overload_latency'] / 1000,
+            throttle_rate=kwargs['throttle_rate'],
+            feed_image_rate=kwargs['feed_image_rate'],
+        )
+        # The recorded pages link to images on the real site, which a benchmark must not download
+        options = {'no_thumbnails': True, 'discovery': kwargs['discovery']}
+        for name in ['workers', 'per_host']:
+            if kwargs[name]:
+                options[name] = kwargs[name]
+        previous_classifier = None
+        if not kwargs['real_classifier']:
+            previous_classifier = set_classifier(StubClassifier(delay=kwargs['classify_delay'] / 1000))
+
+        # Scraped rows go to a throwaway test database, never the configured one
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        base_url = site.start()
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+                CRAWLER_BASE_URL=base_url,
+                CRAWLER_CACHE_DIR=cache_dir,
+                CRAWLER_FEEDS={section.name: [feed_path(section.path)] for section in SECTIONS.values()},
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            ):
+                results = [self.run(name, site, options) for name in names]
+        finally:
+            site.stop()
+            teardown_databases(old_config, verbosity=0)
+            if not kwargs['real_classifier']:
+                set_classifier(previous_classifier)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'config': {name: kwargs[name] for name in [
+                'articles', 'latency', 'jitter', 'error_rate', 'capacity', 'retry_after', 'overload_latency',
+                'throttle_rate', 'discovery', 'feed_image_rate', 'classify_delay', 'real_classifier', 'workers', 'per_host', 'seed',
+            ]},
+            'results': results,
+            'max_rss_bytes': max_rss_bytes(),
+        }
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            for result in results:
+                self.stdout.write(
+                    f"{result['command']}: {result['pages_per_second']:.1f} pages/s, "
+                    f"{result['articles_saved']} articles in {result['seconds']:.2f}s, "
+                    f"peak {result['peak_memory_bytes'] / 2 ** 20:.1f} MiB"
+                )
+            self.stdout.write(f"Results written to {kwargs['output']}")
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, name, site, options):
+        """Crawl the stand-in from an empty database with one command and measure it."""
+        call_command('flush', interactive=False, verbosity=0)
+        get_classification_cache().clear()
+        get_rate_controller().reset()  # Each command starts without what the previous one learnt
+        command = load_command_class('webapp', name)
+        requests_before, statuses_before = site.requests, site.statuses.copy()
+        site.peak_in_flight = 0
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        call_command(command, stdout=StringIO(), stderr=StringIO(), **options)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        pages = site.requests - requests_before
+        return {
+            'command': name,
+            'seconds': seconds,
+            'pages': pages,
+            'pages_per_second': pages / seconds if seconds else 0.0,
+            'statuses': {str(status): count for status, count in (site.statuses - statuses_before).items()},
+            'articles_saved': sum(section.model.objects.count() for section in SECTIONS.values()),
+            'stages': command.crawler.timings,
+            'metrics': command.crawler.metrics.report(),
+            'peak_memory_bytes': peak,
+            'peak_requests_in_flight': site.peak_in_flight,
+            'hosts': get_rate_controller().state(),
+        }
@@ -0,0 +1,73 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from webapp.benchmarks.loadtest import LoadRun
+
+# Section pages are served from the page cache once warm; the API pages query the database every time
+DEFAULT_PATHS = [
+    '/', '/news/', '/sports/', '/business/', '/innovation/', '/travel/', '/latest/',
+    '/api/news/', '/api/latest/?per_page=50', '/api/search/?q=election',
+]
+
+
+def parse_target(value):
+    name, sep, url = value.partition('=')
+    if not sep or not name or not url.startswith(('http://', 'https://')):
+        raise CommandError(f"Targets look like wsgi=http://127.0.0.1:8000, not '{value}'")
+    return name, url
+
+
+class Command(BaseCommand):
+    help = ('Load test running servers and compare throughput and p50/p90/p99 latency across '
+            'concurrency levels, e.g. the WSGI deployment against the ASGI profile. Start them with\n'
+            '  gunicorn myweb.wsgi --workers 4 --threads 8 --bind 127.0.0.1:8000\n'
+            '  uvicorn myweb.asgi:application --workers 4 --port 8001 --no-access-log\n'
+            'against the same database, then run\n'
+            '  manage.py bench_views wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001')
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', metavar='name=url', help='Servers to compare')
+        parser.add_argument('--concurrency', default='1,8,32,128',
+                            help='Comma-separated numbers of concurrent clients to try (default: 1,8,32,128)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds measured at each level')
+        parser.add_argument('--warmup', type=float, default=2, help='Seconds of unmeasured load before each level')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request; repeat for several (default: the section pages and the API)')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of standard output')
+
+    def handle(self, *args, **kwargs):
+        targets = [parse_target(value) for value in kwargs['targets']]
+        try:
+            levels = [int(level) for level in kwargs['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be comma-separated numbers")
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency levels must be at least 1")
+        paths = kwargs['paths'] or DEFAULT_PATHS
+
+        results = {}
+        for name, url in targets:
+            results[name] = {'url': url, 'levels': []}
+            for level in levels:
+                result = LoadRun(url, paths, level, kwargs['duration'], warmup=kwargs['warmup']).run()
+                results[name]['levels'].append(result)
+                self.stderr.write(
+                    f"{name} x{level}: {result['requests_per_second']:.0f} req/s, "
+                    f"p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms, "
+                    f"{result['errors']} errors"
+                )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'config': {'concurrency': levels, 'duration': kwargs['duration'], 'warmup': kwargs['warmup'],
+                       'paths': paths},
+            'results': results,
+        }
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Results written to {kwargs['output']}")
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
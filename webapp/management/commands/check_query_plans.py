@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from webapp.models import BusinessArticle, FeedEntry, HomeArticle, InnovationArticle, NewsArticle, SportsArticle, TravelArticle
+from webapp.pagination import older_than
+
+# The list views and the column each one pages on (see webapp/views.py)
+VIEW_QUERIES = [
+    ('index', HomeArticle, 'published_at'),
+    ('sports', SportsArticle, 'date_created'),
+    ('news', NewsArticle, 'scraped_at'),
+    ('business', BusinessArticle, 'business_published_at'),
+    ('innovation', InnovationArticle, 'innovation_created_at'),
+    ('travel', TravelArticle, 'travel_created_at'),
+    ('latest', FeedEntry, 'published_at'),
+]
+
+
+def uses_index(plan, seek=False):
+    """
+    Whether an EXPLAIN plan reads rows in index order rather than scanning and sorting.
+
+    With `seek`, the index must also be used to jump to the cursor rather than
+    being walked from the newest row.
+    """
+    if connection.vendor == 'postgresql':
+        ordered = 'Index' in plan and 'Sort' not in plan and 'Seq Scan' not in plan
+        return ordered and (not seek or 'Index Cond' in plan)
+    if connection.vendor == 'sqlite':
+        ordered = 'USING INDEX' in plan and 'TEMP B-TREE' not in plan
+        return ordered and (not seek or 'SEARCH' in plan)
+    return 'Index' in plan or 'INDEX' in plan
+
+
+class Command(BaseCommand):
+    help = "Show the query plan of each section view's first and next page and check that they use an index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plans')
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # On small tables PostgreSQL rightly prefers a sequential scan; ask whether an index *can* serve the query
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def handle(self, *args, **kwargs):
+        cursor = (timezone.now(), 2 ** 31)
+        page_size = settings.ARTICLES_PER_PAGE + 1
+        failures = []
+        for view, model, field in VIEW_QUERIES:
+            queryset = model.objects.all()
+            for label, query, seek in [('first page', older_than(queryset, field)[:page_size], False),
+                                       ('next page', older_than(queryset, field, cursor)[:page_size], True)]:
+                plan = self.explain(query)
+                ok = uses_index(plan, seek=seek)
+                self.stdout.write(f"{view} ({label}): {'index' if ok else 'NO INDEX'}")
+                if kwargs['verbose_plans'] or not ok:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                if not ok:
+                    failures.append(f"{view} ({label})")
+
+        if failures:
+            raise CommandError(f"Queries not served by an index on {connection.vendor}: {', '.join(failures)}")
+        self.stdout.write(f"Every section view query uses an index on {connection.vendor}.")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from webapp.crawler.classify import MODEL_NAME, get_classification_cache
+from webapp.models import TitleClassification
+
+
+class Command(BaseCommand):
+    help = 'Invalidate cached title classifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale', action='store_true',
+                            help=f'Only drop labels produced by models other than {MODEL_NAME}')
+
+    def handle(self, *args, **kwargs):
+        before = TitleClassification.objects.count()
+        cache = get_classification_cache()
+        if kwargs['stale']:
+            cache.prune()
+        else:
+            cache.clear()
+        self.stdout.write(f"{before - TitleClassification.objects.count()} cached classifications removed.")
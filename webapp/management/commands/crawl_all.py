@@ -0,0 +1,19 @@
+from django.core.management.base import CommandError
+from webapp.crawler.command import CrawlCommand
+from webapp.crawler.sections import SECTIONS
+
+
+class Command(CrawlCommand):
+    help = 'Scrape several BBC sections in one process with a shared fetch pool, classifier and URL dedup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*', metavar='section',
+                            help=f"Sections to crawl (default: all of {', '.join(SECTIONS)})")
+        super().add_arguments(parser)
+
+    def handle(self, *args, **kwargs):
+        names = kwargs['sections'] or list(SECTIONS)
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            raise CommandError(f"Unknown section(s): {', '.join(unknown)}")
+        self.crawl([SECTIONS[name] for name in dict.fromkeys(names)], kwargs)
@@ -0,0 +1,134 @@
+import random
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import close_old_connections
+
+from webapp.crawler.classify import get_classifier, limit_torch_threads
+from webapp.crawler.command import CrawlCommand
+from webapp.crawler.fetch import get_session
+from webapp.crawler.sections import SECTIONS
+
+# How often the scheduler wakes to reap finished crawls when nothing is due sooner, in seconds
+TICK = 1.0
+
+
+def parse_interval(value):
+    name, sep, seconds = value.partition('=')
+    if not sep or name not in SECTIONS:
+        raise CommandError(f"Intervals look like news=600 with a section from {', '.join(SECTIONS)}, not '{value}'")
+    try:
+        seconds = float(seconds)
+    except ValueError:
+        raise CommandError(f"Interval of '{name}' must be a number of seconds")
+    if seconds <= 0:
+        raise CommandError(f"Interval of '{name}' must be positive")
+    return name, seconds
+
+
+class Command(CrawlCommand):
+    help = ('Keep crawling the sections on their own schedules in one long-running process, so the classifier, '
+            'HTTP connections and database connections stay warm between runs. Stops cleanly on SIGTERM/SIGINT.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*', metavar='section',
+                            help="Sections to schedule (default: every section in CRAWLER_SCHEDULE)")
+        parser.add_argument('--interval', action='append', default=[], metavar='section=seconds',
+                            help='Override the CRAWLER_SCHEDULE interval of a section; repeat for several')
+        parser.add_argument('--jitter', type=float, default=settings.CRAWLER_SCHEDULE_JITTER,
+                            help='Random share of each interval added or taken off, e.g. 0.1 for +/-10%%')
+        parser.add_argument('--max-concurrent', type=int, default=settings.CRAWLER_SCHEDULE_MAX_CONCURRENT,
+                            help='Most sections crawled at the same time; due sections wait for a free slot')
+        parser.add_argument('--no-warm', action='store_true',
+                            help='Load the classifier on first use instead of at startup')
+        super().add_arguments(parser)
+
+    def get_crawler(self, **kwargs):
+        crawler = super().get_crawler(**kwargs)
+        crawler.stop = self.stopping
+        return crawler
+
+    def handle(self, *args, **kwargs):
+        intervals = dict(settings.CRAWLER_SCHEDULE)
+        intervals.update(parse_interval(value) for value in kwargs['interval'])
+        names = kwargs['sections'] or [name for name in intervals if name in SECTIONS]
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            raise CommandError(f"Unknown section(s): {', '.join(unknown)}")
+        unscheduled = [name for name in names if name not in intervals]
+        if unscheduled:
+            raise CommandError(f"No interval for {', '.join(unscheduled)}; pass --interval {unscheduled[0]}=<seconds>")
+        if not 0 <= kwargs['jitter'] < 1:
+            raise CommandError("--jitter must be at least 0 and below 1")
+        max_concurrent = max(1, kwargs['max_concurrent'])
+
+        self.stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.request_stop)
+        if not kwargs['no_warm']:
+            self.warm(kwargs, max_concurrent)
+
+        rng = random.Random()
+        jitter = kwargs['jitter']
+        now = time.monotonic()
+        # The first runs are spread over the jitter window so the sections do not all start at once
+        due = {name: now + rng.uniform(0, jitter * intervals[name]) for name in dict.fromkeys(names)}
+        running = {}  # Section name -> future of its crawl
+        self.stdout.write(
+            f"Scheduling {', '.join(f'{name} every {intervals[name]:g}s' for name in due)}, "
+            f"at most {max_concurrent} at a time."
+        )
+
+        with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='crawl') as executor:
+            while not self.stopping.is_set():
+                for name, future in list(running.items()):
+                    if future.done():
+                        del running[name]
+
+                now = time.monotonic()
+                for name in sorted(due, key=due.get):
+                    if due[name] > now or name in running or len(running) >= max_concurrent:
+                        continue
+                    running[name] = executor.submit(self.run_section, name, kwargs)
+                    # Jittered, so sections on the same interval drift apart instead of crawling in lockstep
+                    due[name] = now + intervals[name] * (1 + rng.uniform(-jitter, jitter))
+
+                waiting = [due[name] for name in due if name not in running]
+                next_due = min(waiting) - time.monotonic() if waiting else TICK
+                self.stopping.wait(min(max(next_due, 0.05), TICK))
+
+            if running:
+                self.stdout.write(f"Stopping; waiting for {', '.join(running)} to save what they have fetched.")
+        self.stdout.write("Scheduler stopped.")
+
+    def request_stop(self, signum, frame):
+        self.stopping.set()
+
+    def warm(self, options, max_concurrent):
+        """Load the classifier and size the HTTP pool up front, instead of in the first crawl."""
+        started = time.perf_counter()
+        # Sized for every crawl that may run at once, as the session is shared by all of them
+        get_session(pool_size=options['workers'] * max_concurrent)
+        if options['torch_threads']:
+            limit_torch_threads(options['torch_threads'])
+        get_classifier()
+        self.stdout.write(f"Classifier loaded in {time.perf_counter() - started:.1f}s.")
+
+    def run_section(self, name, options):
+        """Crawl one section on a pool thread; a failure is reported and the section tried again next time."""
+        started = time.perf_counter()
+        self.stdout.write(f"Crawling {name}.")
+        # Each pool thread keeps its database connection between runs, unless it went bad or outlived CONN_MAX_AGE
+        close_old_connections()
+        try:
+            self.crawl([SECTIONS[name]], options)
+        except Exception:
+            self.stderr.write(f"Crawl of {name} failed:\n{traceback.format_exc()}")
+        finally:
+            close_old_connections()
+        self.stdout.write(f"Finished {name} in {time.perf_counter() - started:.1f}s.")
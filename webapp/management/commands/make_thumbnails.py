@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from webapp.crawler.sections import FEED, SECTIONS
+from webapp.crawler.thumbnails import ThumbnailMaker
+from webapp.section_cache import bump_version, warm_section_page
+
+
+class Command(BaseCommand):
+    help = 'Make the missing thumbnails of stored article images, e.g. for articles scraped before thumbnails existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*', metavar='section',
+                            help=f"Sections whose images to process (default: all of {', '.join(SECTIONS)})")
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of images downloaded and resized concurrently (default: THUMBNAIL_WORKERS)')
+
+    def handle(self, *args, **kwargs):
+        names = kwargs['sections'] or list(SECTIONS)
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            raise CommandError(f"Unknown section(s): {', '.join(unknown)}")
+
+        images = {}  # Image URL -> names of the sections showing it
+        for name in dict.fromkeys(names):
+            section = SECTIONS[name]
+            urls = (section.model.objects.exclude(**{f'{section.image_field}__isnull': True})
+                    .exclude(**{section.image_field: ''}).values_list(section.image_field, flat=True).distinct())
+            for url in urls.iterator():
+                images.setdefault(url, set()).add(name)
+
+        maker = ThumbnailMaker(workers=kwargs['workers'], stderr=self.stderr)
+        outcomes = maker.make(list(images))
+        refreshed = {name for url in outcomes.get('ok', []) for name in images[url]}
+        for name in sorted(refreshed) + ([FEED.name] if refreshed else []):
+            bump_version(name)
+            warm_section_page(name)
+        self.stdout.write(f"Thumbnails: {maker.summary(outcomes) or 'none missing'}.")
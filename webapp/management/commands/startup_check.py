@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that must only be imported once a crawl actually needs to classify something
+HEAVY_MODULES = {'torch', 'transformers', 'tensorflow'}
+SCRAPER_COMMANDS = ['home', 'news', 'sports', 'business', 'innovations', 'travel', 'crawl_all']
+
+
+def import_profile(module):
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+
+    Returns the module's cumulative import time in microseconds and the set of
+    top-level packages imported along the way.
+    """
+    code = f"import django; django.setup(); import {module}"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise CommandError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        name = fields[2].strip()
+        if not fields[1].strip().isdigit():
+            continue  # Header line
+        imported.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(fields[1])
+    return cumulative, imported
+
+
+class Command(BaseCommand):
+    help = 'Check that importing the scraper commands stays fast and never loads the classifier'
+
+    def handle(self, *args, **kwargs):
+        failures = []
+        for name in SCRAPER_COMMANDS:
+            module = f'webapp.management.commands.{name}'
+            cumulative, imported = import_profile(module)
+            heavy = sorted(HEAVY_MODULES & imported)
+            self.stdout.write(f"{name}: {cumulative / 1000:.1f} ms" + (f" (imports {', '.join(heavy)})" if heavy else ""))
+            if heavy:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f"Heavy modules imported at startup by: {', '.join(failures)}")
+        self.stdout.write("No scraper command loads the classifier at import time.")
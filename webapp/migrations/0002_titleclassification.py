@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleClassification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model_name', models.CharField(db_index=True, max_length=200)),
+                ('label', models.CharField(max_length=100)),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
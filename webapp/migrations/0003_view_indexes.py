@@ -0,0 +1,80 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:21
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_sports_links(apps, schema_editor):
+    # sports_link had no unique constraint, so keep only the oldest row for each link
+    SportsArticle = apps.get_model('webapp', 'SportsArticle')
+    duplicates = (
+        SportsArticle.objects.values('sports_link')
+        .annotate(keep_id=Min('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates:
+        SportsArticle.objects.filter(sports_link=row['sports_link']).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0002_titleclassification'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_sports_links, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='sportsarticle',
+            name='sports_link',
+            field=models.URLField(max_length=1000, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='businessarticle',
+            index=models.Index(fields=['-business_published_at', '-id'], name='business_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessarticle',
+            index=models.Index(fields=['business_category', '-business_published_at'], name='business_category_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homearticle',
+            index=models.Index(fields=['-published_at', '-id'], name='home_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homearticle',
+            index=models.Index(fields=['category', '-published_at'], name='home_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='innovationarticle',
+            index=models.Index(fields=['-innovation_created_at', '-id'], name='innovation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='innovationarticle',
+            index=models.Index(fields=['innovation_category', '-innovation_created_at'], name='innovation_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['-scraped_at', '-id'], name='news_scraped_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['news_category', '-scraped_at'], name='news_category_scraped_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportsarticle',
+            index=models.Index(fields=['-date_created', '-id'], name='sports_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportsarticle',
+            index=models.Index(fields=['sports_category', '-date_created'], name='sports_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelarticle',
+            index=models.Index(fields=['-travel_created_at', '-id'], name='travel_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelarticle',
+            index=models.Index(fields=['travel_category', '-travel_created_at'], name='travel_category_created_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.5 on 2026-10-17 17:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# (section, model, column prefix, timestamp column), as in webapp/crawler/sections.py
+SECTION_MODELS = [
+    ('home', 'HomeArticle', '', 'published_at'),
+    ('news', 'NewsArticle', 'news_', 'scraped_at'),
+    ('sports', 'SportsArticle', 'sports_', 'date_created'),
+    ('business', 'BusinessArticle', 'business_', 'business_published_at'),
+    ('innovations', 'InnovationArticle', 'innovation_', 'innovation_created_at'),
+    ('travel', 'TravelArticle', 'travel_', 'travel_created_at'),
+]
+
+
+def copy_articles_to_feed(apps, schema_editor):
+    FeedEntry = apps.get_model('webapp', 'FeedEntry')
+    for section, model_name, prefix, timestamp_field in SECTION_MODELS:
+        model = apps.get_model('webapp', model_name)
+        columns = [f'{prefix}{name}' for name in ('title', 'link', 'image_url', 'category', 'summary')]
+        rows = model.objects.values_list(*columns, timestamp_field).iterator(chunk_size=2000)
+        batch = []
+        for title, link, image_url, category, summary, published_at in rows:
+            batch.append(FeedEntry(section=section, title=title, link=link, image_url=image_url,
+                                   category=category, summary=summary, published_at=published_at))
+            if len(batch) >= 2000:
+                FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0004_sectionversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=50)),
+                ('title', models.CharField(max_length=2555)),
+                ('link', models.URLField(max_length=1000)),
+                ('image_url', models.URLField(blank=True, max_length=1000, null=True)),
+                ('category', models.CharField(default='Unknown', max_length=500)),
+                ('summary', models.TextField(blank=True, null=True)),
+                ('published_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Feed entries',
+                'indexes': [models.Index(fields=['-published_at', '-id'], name='feed_published_idx'), models.Index(fields=['section', '-published_at', '-id'], name='feed_section_published_idx')],
+                'constraints': [models.UniqueConstraint(fields=('section', 'link'), name='feed_section_link_unique')],
+            },
+        ),
+        migrations.RunPython(copy_articles_to_feed, migrations.RunPython.noop),
+    ]
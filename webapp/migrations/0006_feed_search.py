@@ -0,0 +1,73 @@
+# Generated by Django 5.1.5 on 2026-10-17 17:40
+
+from django.db import migrations
+
+# PostgreSQL keeps the tsvector in a generated column, so every insert or update indexes itself
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE webapp_feedentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX feed_search_idx ON webapp_feedentry USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS feed_search_idx",
+    "ALTER TABLE webapp_feedentry DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite mirrors the feed into an external-content FTS5 table kept in sync by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE webapp_feedentry_fts USING fts5(
+        title, summary, content='webapp_feedentry', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER webapp_feedentry_fts_insert AFTER INSERT ON webapp_feedentry BEGIN
+        INSERT INTO webapp_feedentry_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER webapp_feedentry_fts_delete AFTER DELETE ON webapp_feedentry BEGIN
+        INSERT INTO webapp_feedentry_fts (webapp_feedentry_fts, rowid, title, summary)
+        VALUES ('delete', old.id, old.title, old.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER webapp_feedentry_fts_update AFTER UPDATE OF title, summary ON webapp_feedentry BEGIN
+        INSERT INTO webapp_feedentry_fts (webapp_feedentry_fts, rowid, title, summary)
+        VALUES ('delete', old.id, old.title, old.summary);
+        INSERT INTO webapp_feedentry_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    """,
+    "INSERT INTO webapp_feedentry_fts (webapp_feedentry_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS webapp_feedentry_fts_update",
+    "DROP TRIGGER IF EXISTS webapp_feedentry_fts_delete",
+    "DROP TRIGGER IF EXISTS webapp_feedentry_fts_insert",
+    "DROP TABLE IF EXISTS webapp_feedentry_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0005_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
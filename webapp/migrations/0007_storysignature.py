@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-17 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0006_feed_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorySignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('link', models.URLField(max_length=1000, unique=True)),
+                ('minhash', models.BinaryField()),
+                ('category', models.CharField(default='Unknown', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StoryBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('story', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='webapp.storysignature')),
+            ],
+        ),
+    ]
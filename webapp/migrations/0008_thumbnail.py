@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0007_storysignature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Thumbnail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.URLField(max_length=1000, unique=True)),
+                ('status', models.CharField(choices=[('ok', 'Thumbnails stored'), ('invalid', 'Not a usable image'), ('failed', 'Download failed')], max_length=10)),
+                ('digest', models.CharField(blank=True, max_length=64)),
+                ('widths', models.JSONField(default=list)),
+                ('width', models.PositiveIntegerField(null=True)),
+                ('height', models.PositiveIntegerField(null=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
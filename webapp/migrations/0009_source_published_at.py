@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0008_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessarticle',
+            name='business_source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='homearticle',
+            name='source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='innovationarticle',
+            name='innovation_source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='news_source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sportsarticle',
+            name='sports_source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='travelarticle',
+            name='travel_source_published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
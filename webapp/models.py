@@ -1,4 +1,6 @@
+from django.core.files.storage import default_storage
 from django.db import models
+from django.utils import timezone
 
 class HomeArticle(models.Model):
     title = models.CharField(max_length=2555)
@@ -7,17 +9,25 @@ class HomeArticle(models.Model):
     category = models.CharField(max_length=500, default='Unknown')  # e.g., 'Sports', 'Politics'
     summary = models.TextField(blank=True)
     published_at = models.DateTimeField(auto_now_add=True)  # Add timestamp
+    source_published_at = models.DateTimeField(blank=True, null=True)  # When the site published it, if known
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='home_published_idx'),
+            models.Index(fields=['category', '-published_at'], name='home_category_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 class SportsArticle(models.Model):
     sports_title = models.CharField(max_length=500)  # Increased limit
-    sports_link = models.URLField(max_length=1000)  # URLs can be long
+    sports_link = models.URLField(max_length=1000, unique=True)  # URLs can be long
     sports_image_url = models.URLField(max_length=1000, blank=True, null=True)
     sports_category = models.CharField(max_length=100, default="Unknown")
     sports_summary = models.TextField(blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True)  # Timestamp when the article is scraped
+    sports_source_published_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return self.title
@@ -26,6 +36,10 @@ class SportsArticle(models.Model):
         verbose_name = 'Sports Article'
         verbose_name_plural = 'Sports Articles'
         ordering = ['-date_created']  # Sort by most recent first
+        indexes = [
+            models.Index(fields=['-date_created', '-id'], name='sports_created_idx'),
+            models.Index(fields=['sports_category', '-date_created'], name='sports_category_created_idx'),
+        ]
         
 class NewsArticle(models.Model):
     news_title = models.CharField(max_length=500)
@@ -34,9 +48,14 @@ class NewsArticle(models.Model):
     news_category = models.CharField(max_length=100, default='Unknown')
     news_summary = models.TextField(blank=True, null=True)
     scraped_at = models.DateTimeField(auto_now_add=True)
+    news_source_published_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         ordering = ['-scraped_at']
+        indexes = [
+            models.Index(fields=['-scraped_at', '-id'], name='news_scraped_idx'),
+            models.Index(fields=['news_category', '-scraped_at'], name='news_category_scraped_idx'),
+        ]
 
     def __str__(self):
         return self.news_title
@@ -48,6 +67,13 @@ class BusinessArticle(models.Model):
     business_category = models.CharField(max_length=100)
     business_summary = models.TextField(blank=True, null=True)
     business_published_at = models.DateTimeField(auto_now_add=True)
+    business_source_published_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-business_published_at', '-id'], name='business_published_idx'),
+            models.Index(fields=['business_category', '-business_published_at'], name='business_category_pub_idx'),
+        ]
 
     def __str__(self):
         return self.business_title
@@ -60,8 +86,15 @@ class InnovationArticle(models.Model):
     innovation_category = models.CharField(max_length=100, default="Uncategorized")
     innovation_summary = models.TextField(blank=True, null=True)
     innovation_created_at = models.DateTimeField(auto_now_add=True)
+    innovation_source_published_at = models.DateTimeField(blank=True, null=True)
     business_published_at = models.DateTimeField(blank=True, null=True)  # Add this field
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-innovation_created_at', '-id'], name='innovation_created_idx'),
+            models.Index(fields=['innovation_category', '-innovation_created_at'], name='innovation_category_idx'),
+        ]
+
     def __str__(self):
         return self.innovation_title
     
@@ -72,6 +105,122 @@ class TravelArticle(models.Model):
     travel_category = models.CharField(max_length=100, default="Uncategorized")
     travel_summary = models.TextField(blank=True, null=True)
     travel_created_at = models.DateTimeField(auto_now_add=True)
+    travel_source_published_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-travel_created_at', '-id'], name='travel_created_idx'),
+            models.Index(fields=['travel_category', '-travel_created_at'], name='travel_category_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.travel_title
+
+class TitleClassification(models.Model):
+    key = models.CharField(max_length=64, unique=True)  # sha256 of the model id and normalised title
+    model_name = models.CharField(max_length=200, db_index=True)
+    label = models.CharField(max_length=100)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
-        return self.travel_title
\ No newline at end of file
+        return f"{self.key[:12]} -> {self.label}"
+
+
+class SectionVersion(models.Model):
+    section = models.CharField(max_length=50, unique=True)  # e.g. 'news', 'innovations'
+    version = models.PositiveIntegerField(default=0)  # Bumped whenever the scraper stores new articles
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.section} v{self.version}"
+
+
+class FeedEntry(models.Model):
+    section = models.CharField(max_length=50)  # Crawler section the article was stored under, e.g. 'news'
+    title = models.CharField(max_length=2555)
+    link = models.URLField(max_length=1000)
+    image_url = models.URLField(max_length=1000, blank=True, null=True)
+    category = models.CharField(max_length=500, default='Unknown')
+    summary = models.TextField(blank=True, null=True)
+    published_at = models.DateTimeField(default=timezone.now)  # Copied from the section row
+    source_published_at = models.DateTimeField(blank=True, null=True)  # When the site published it, if known
+
+    class Meta:
+        verbose_name_plural = 'Feed entries'
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'link'], name='feed_section_link_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='feed_published_idx'),
+            models.Index(fields=['section', '-published_at', '-id'], name='feed_section_published_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.section}] {self.title}"
+
+
+class StorySignature(models.Model):
+    link = models.URLField(max_length=1000, unique=True)  # The first copy of the story that was stored
+    minhash = models.BinaryField()  # MinHash of the title + summary wording (see webapp/crawler/dedup.py)
+    category = models.CharField(max_length=500, default='Unknown')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.link
+
+
+class StoryBand(models.Model):
+    # One row per LSH band of a story; stories that share a key are candidate near-duplicates
+    story = models.ForeignKey(StorySignature, on_delete=models.CASCADE, related_name='bands')
+    key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} -> {self.story_id}"
+
+
+class Thumbnail(models.Model):
+    STATUS_CHOICES = [
+        ('ok', 'Thumbnails stored'),
+        ('invalid', 'Not a usable image'),  # Not retried
+        ('failed', 'Download failed'),  # Retried by later runs, up to THUMBNAIL_MAX_ATTEMPTS
+    ]
+
+    source_url = models.URLField(max_length=1000, unique=True)  # The article image they were made from
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    digest = models.CharField(max_length=64, blank=True)  # sha256 of the original, which names the files
+    widths = models.JSONField(default=list)  # Widths stored, each as WebP and JPEG
+    width = models.PositiveIntegerField(null=True)  # Size of the original
+    height = models.PositiveIntegerField(null=True)
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_url} ({self.status})"
+
+    @staticmethod
+    def file_name(digest, width, extension):
+        return f"thumbs/{digest[:2]}/{digest[:24]}-{width}w.{extension}"
+
+    def srcset(self, extension):
+        return ', '.join(
+            f"{default_storage.url(self.file_name(self.digest, width, extension))} {width}w" for width in self.widths
+        )
+
+    @property
+    def webp_srcset(self):
+        return self.srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('jpg')
+
+    @property
+    def src(self):
+        """The smallest JPEG, for browsers without srcset support."""
+        return default_storage.url(self.file_name(self.digest, min(self.widths), 'jpg'))
+
+    @property
+    def display_height(self):
+        """Height of the smallest thumbnail, which with its width tells the browser the aspect ratio up front."""
+        return round(self.height * min(self.widths) / self.width)
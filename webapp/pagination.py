@@ -0,0 +1,110 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, plus the cursors to its neighbours."""
+
+    def __init__(self, object_list, timestamp_field, has_next, has_previous, per_page=None):
+        self.object_list = object_list
+        self.timestamp_field = timestamp_field
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.per_page = per_page  # The page size used, after defaults and caps
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, self.timestamp_field), obj.pk)
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self._cursor(self.object_list[0]) if self.has_previous else None
+
+
+def encode_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return `(timestamp, pk)` from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_size(request):
+    """The `per_page` query parameter, defaulting to and capped by the settings."""
+    try:
+        size = int(request.GET.get('per_page', settings.ARTICLES_PER_PAGE))
+    except ValueError:
+        size = settings.ARTICLES_PER_PAGE
+    return max(1, min(size, settings.ARTICLES_MAX_PER_PAGE))
+
+
+def older_than(queryset, timestamp_field, cursor=None):
+    """`queryset` newest first on `(timestamp_field, id)`, starting after `cursor` if given."""
+    if cursor:
+        timestamp, pk = cursor
+        # The redundant `<=` bound lets the database seek straight to the cursor in the index
+        queryset = queryset.filter(**{f'{timestamp_field}__lte': timestamp}).filter(
+            Q(**{f'{timestamp_field}__lt': timestamp}) | Q(pk__lt=pk)
+        )
+    return queryset.order_by(f'-{timestamp_field}', '-pk')
+
+
+def _keyset_query(request, queryset, timestamp_field):
+    """The query for the requested page, which fetches one extra row to tell whether there is another."""
+    size = page_size(request)
+    after = decode_cursor(request.GET.get('after'))
+    before = None if after else decode_cursor(request.GET.get('before'))
+
+    if before:
+        timestamp, pk = before
+        query = (
+            queryset.filter(**{f'{timestamp_field}__gte': timestamp})
+            .filter(Q(**{f'{timestamp_field}__gt': timestamp}) | Q(pk__gt=pk))
+            .order_by(timestamp_field, 'pk')
+        )
+    else:
+        query = older_than(queryset, timestamp_field, after)
+    return query[:size + 1], (timestamp_field, size, after, before)
+
+
+def _keyset_page(rows, timestamp_field, size, after, before):
+    if before:
+        return KeysetPage(rows[:size][::-1], timestamp_field, has_next=True, has_previous=len(rows) > size,
+                          per_page=size)
+    return KeysetPage(rows[:size], timestamp_field, has_next=len(rows) > size, has_previous=bool(after),
+                      per_page=size)
+
+
+def keyset_paginate(request, queryset, timestamp_field):
+    """
+    Page through `queryset` newest first on `(timestamp_field, id)`.
+
+    `?after=<cursor>` moves to older articles and `?before=<cursor>` to newer ones.
+    Each page is a range scan starting at the cursor, so its cost does not depend on
+    how deep into the archive it is, unlike an OFFSET.
+    """
+    query, state = _keyset_query(request, queryset, timestamp_field)
+    return _keyset_page(list(query), *state)
+
+
+async def akeyset_paginate(request, queryset, timestamp_field):
+    """`keyset_paginate()` for async views: the page is read through the async ORM."""
+    query, state = _keyset_query(request, queryset, timestamp_field)
+    return _keyset_page([row async for row in query], *state)
@@ -0,0 +1,144 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('webapp.profiling')
+
+_current = ContextVar('request_profile', default=None)
+_patch_lock = threading.Lock()
+_original_render = None
+
+
+class RequestProfile:
+    """Where one request spent its time: queries, template rendering (per template) and the rest of the view."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0  # Outermost templates only, so includes are not counted twice
+        self.templates = {}  # Template name -> time spent in it, excluding the templates it includes
+        self._stack = []  # [name, started, time spent in nested templates] per template being rendered
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - started
+
+    def enter_template(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit_template(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.templates[name] = self.templates.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        else:
+            self.render_time += elapsed
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def view_time(self):
+        """Time in the view and the middleware below this one, outside template rendering."""
+        return max(self.total - self.render_time, 0.0)
+
+    def server_timing(self):
+        metrics = [
+            f'total;dur={self.total * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries"',
+            f'render;dur={self.render_time * 1000:.1f}',
+        ]
+        for name, spent in sorted(self.templates.items(), key=lambda item: -item[1]):
+            metrics.append(f'tpl;dur={spent * 1000:.1f};desc="{name}"')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'view_ms': round(self.view_time * 1000, 1),
+            'queries': self.queries,
+            'db_ms': round(self.query_time * 1000, 1),
+            'render_ms': round(self.render_time * 1000, 1),
+            'templates_ms': {name: round(spent * 1000, 1) for name, spent in self.templates.items()},
+        }
+
+
+def _profiled_render(self, context):
+    profile = _current.get()
+    if profile is None:
+        return _original_render(self, context)
+    profile.enter_template(self.name or '<string>')
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.exit_template()
+
+
+def instrument_templates():
+    """Time `Template.render`, which runs for every page template and every `{% include %}`."""
+    global _original_render
+    with _patch_lock:
+        if _original_render is None:
+            _original_render = Template.render
+            Template.render = _profiled_render
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile each request when `REQUEST_PROFILING` is on.
+
+    The response gets a `Server-Timing` header with the total time, the view's
+    own time, the query count and time, the template render time and each
+    template's share (e.g. news.html against the nave.html and footer.html it
+    includes), which browser dev tools show under the request's Timing tab.
+    A `REQUEST_PROFILING_SAMPLE_RATE` share of requests, and every request slower
+    than `REQUEST_PROFILING_SLOW_MS`, is also logged to `webapp.profiling`.
+
+    When the setting is off, Django drops the middleware at startup and templates
+    are left unpatched, so it costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_PROFILING_SLOW_MS
+        instrument_templates()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+            profile.finish()
+
+        response['Server-Timing'] = profile.server_timing()
+        total_ms = profile.total * 1000
+        if self.slow_ms is not None and total_ms >= self.slow_ms:
+            logger.warning("Slow request %s %s: %s", request.method, request.get_full_path(), profile.as_dict())
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info("Request %s %s: %s", request.method, request.get_full_path(), profile.as_dict())
+        return response
+
@@ -0,0 +1,91 @@
+import re
+
+from django.db import connection
+
+from webapp.models import FeedEntry
+
+# Text search configuration of the `search_vector` column (see migration 0006)
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'webapp_feedentry_fts'
+# Deepest page of results served; an OFFSET grows with the page, and databases reject huge ones
+MAX_PAGE = 1000
+
+# Title matches count for more than summary matches
+POSTGRES_SEARCH = """
+    SELECT f.id FROM webapp_feedentry f, websearch_to_tsquery(%s, %s) query
+    WHERE f.search_vector @@ query {section_filter}
+    ORDER BY ts_rank_cd(f.search_vector, query) DESC, f.id DESC
+    LIMIT %s OFFSET %s
+"""
+SQLITE_SEARCH = f"""
+    SELECT f.id FROM {FTS_TABLE} JOIN webapp_feedentry f ON f.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s {{section_filter}}
+    ORDER BY bm25({FTS_TABLE}, 4.0, 1.0), f.id DESC
+    LIMIT %s OFFSET %s
+"""
+
+
+class SearchPage:
+    """One page of search results, best match first."""
+
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.has_next = has_next
+        self.has_previous = number > 1
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def fts5_query(text):
+    """
+    Quote every word of `text` as an FTS5 string, so user input can never be read
+    as query syntax (`AND`, `NEAR`, column filters, ...); all words must match.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def search_ids(text, section=None, limit=25, offset=0):
+    """Ids of the feed entries matching `text`, best match first, using the database's full-text index."""
+    section_filter = 'AND f.section = %s' if section else ''
+    if connection.vendor == 'postgresql':
+        sql = POSTGRES_SEARCH.format(section_filter=section_filter)
+        params = [SEARCH_CONFIG, text]
+    elif connection.vendor == 'sqlite':
+        text = fts5_query(text)
+        if not text:
+            return []
+        sql = SQLITE_SEARCH.format(section_filter=section_filter)
+        params = [text]
+    else:
+        raise NotImplementedError(f"Full-text search is not set up for {connection.vendor}")
+    params += ([section] if section else []) + [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(text, section=None, page=1, per_page=25):
+    """
+    Search titles and summaries of every section's articles.
+
+    Matching and ranking run entirely inside the full-text index (a GIN index over
+    a tsvector on PostgreSQL, an FTS5 table on SQLite); only the ids of one page
+    come back, and their rows are then loaded by primary key. `page` is clamped
+    to 1..`MAX_PAGE`.
+    """
+    page = min(max(1, page), MAX_PAGE)
+    ids = search_ids(text, section=section, limit=per_page + 1, offset=(page - 1) * per_page)
+    rows = FeedEntry.objects.in_bulk(ids[:per_page])
+    has_next = len(ids) > per_page and page < MAX_PAGE
+    return SearchPage([rows[pk] for pk in ids[:per_page] if pk in rows], page, has_next=has_next)
@@ -0,0 +1,176 @@
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from webapp.models import SectionVersion
+from webapp.pagination import decode_cursor, encode_cursor, page_size
+
+# Crawler section name -> URL name of its list view
+SECTION_VIEWS = {
+    'home': 'index',
+    'news': 'news',
+    'sports': 'sports',
+    'business': 'business',
+    'innovations': 'innovation',
+    'travel': 'travel',
+    'latest': 'latest',  # The cross-section feed; bumped whenever any section stores articles
+}
+
+
+def get_version(section):
+    return SectionVersion.objects.filter(section=section).values_list('version', flat=True).first() or 0
+
+
+def section_state(request, section):
+    """`(version, updated_at)` of a section, read from the database once per request."""
+    states = request.__dict__.setdefault('_section_states', {})
+    if section not in states:
+        row = SectionVersion.objects.filter(section=section).values_list('version', 'updated_at').first()
+        states[section] = row or (0, None)
+    return states[section]
+
+
+async def asection_state(request, section):
+    """`section_state()` for async views, sharing its per-request memo."""
+    states = request.__dict__.setdefault('_section_states', {})
+    if section not in states:
+        row = await SectionVersion.objects.filter(section=section).values_list('version', 'updated_at').afirst()
+        states[section] = row or (0, None)
+    return states[section]
+
+
+def bump_version(section):
+    """Mark a section's cached pages as stale; called by the scraper after it stores new articles."""
+    SectionVersion.objects.get_or_create(section=section)
+    # update() skips auto_now, and `updated_at` is the pages' Last-Modified
+    SectionVersion.objects.filter(section=section).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def page_key(section, version, request):
+    """
+    Cache key of a list page: its path and only the query parameters the list views
+    read, normalised, so tracking parameters or junk never store another copy.
+    """
+    params = {}
+    after = decode_cursor(request.GET.get('after'))
+    before = None if after else decode_cursor(request.GET.get('before'))
+    if after:
+        params['after'] = encode_cursor(*after)
+    elif before:
+        params['before'] = encode_cursor(*before)
+    if request.GET.get('per_page'):
+        params['per_page'] = page_size(request)
+    return f"section-page:{section}:{version}:{request.path}?{urlencode(params)}"
+
+
+def cache_section_page(section):
+    """
+    Serve a section list view from the cache until the section's version changes.
+
+    Entries are keyed by the section's current version, so a scrape that bumps it
+    makes every old entry unreachable at once instead of waiting for a timeout.
+    Async views read the version and the cache without blocking the event loop.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+
+                key = page_key(section, (await asection_state(request, section))[0], request)
+                cached = await cache.aget(key)
+                if cached is not None:
+                    content, content_type = cached
+                    return HttpResponse(content, content_type=content_type)
+
+                response = await view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    await cache.aset(key, (response.content, response['Content-Type']),
+                                     settings.SECTION_PAGE_CACHE_TIMEOUT)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            key = page_key(section, section_state(request, section)[0], request)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.content, response['Content-Type']), settings.SECTION_PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def section_page(section):
+    """
+    Conditional GET and page caching for a section list view.
+
+    The section version doubles as the page's validator: a request whose
+    `If-None-Match`/`If-Modified-Since` still matches gets a 304 straight away,
+    without running the view's query or touching the page cache.
+    """
+    def etag(request, *args, **kwargs):
+        return f'"{section}-{section_state(request, section)[0]}"'
+
+    def last_modified(request, *args, **kwargs):
+        return section_state(request, section)[1]
+
+    def decorator(view):
+        cached_view = cache_section_page(section)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_revalidated_view(request, *args, **kwargs):
+                response = await cached_view(request, *args, **kwargs)
+                patch_cache_control(response, public=True, no_cache=True)
+                return response
+
+            conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(async_revalidated_view)
+
+            @wraps(view)
+            async def async_view(request, *args, **kwargs):
+                # condition() calls etag() and last_modified() synchronously, where the ORM may
+                # not run; reading the state here first leaves them only the per-request memo
+                await asection_state(request, section)
+                return await conditional_view(request, *args, **kwargs)
+            return async_view
+
+        @wraps(view)
+        def revalidated_view(request, *args, **kwargs):
+            response = cached_view(request, *args, **kwargs)
+            # Let browsers and the CDN keep the page but check back with us before reusing it
+            patch_cache_control(response, public=True, no_cache=True)
+            return response
+
+        return condition(etag_func=etag, last_modified_func=last_modified)(revalidated_view)
+    return decorator
+
+
+def warm_section_page(section):
+    """Render a section's first page into the cache so the first visitor after a crawl does not pay for it."""
+    from django.test import RequestFactory
+
+    path = reverse(SECTION_VIEWS[section])
+    request = RequestFactory().get(path)
+    view = resolve(path).func
+    if iscoroutinefunction(view):
+        return async_to_sync(view)(request)
+    return view(request)
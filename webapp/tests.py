@@ -1,3 +1,1328 @@
-from django.test import TestCase
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import sync_to_async
+from bs4 import BeautifulSoup
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.management.base import OutputWrapper
+from django.db import DatabaseError
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from webapp.benchmarks.classifier import STUB_LABEL, StubClassifier
+from webapp.benchmarks.server import ARTICLE_FIXTURES, StandInSite, feed_path
+from webapp.crawler.classify import (
+    MODEL_NAME,
+    UNKNOWN_LABEL,
+    ClassificationCache,
+    classify_titles,
+    get_classification_cache,
+    get_classifier,
+    set_classifier,
+    title_key,
+)
+from webapp.crawler.dedup import Story, StoryIndex, band_keys, similarity, story_signature
+from webapp.crawler.extract import NO_TITLE, extract_article, is_valid_image_url
+from webapp.crawler.fetch import ValidatorCache, fetch, fetch_all
+from webapp.crawler.links import KnownLinks, link_digest
+from webapp.crawler.metrics import CrawlMetrics
+from webapp.crawler.pipeline import Crawler
+from webapp.crawler.ratelimit import (
+    DECREASE,
+    CircuitOpen,
+    HostController,
+    Stopped,
+    get_rate_controller,
+    parse_retry_after,
+)
+from webapp.crawler.sections import SECTIONS
+from webapp.crawler.thumbnails import InvalidImage, ThumbnailMaker, download
+from webapp.crawler.store import ArticleWriter
+from webapp.management.commands.crawl_scheduler import Command as SchedulerCommand, parse_interval
+from webapp.management.commands.startup_check import HEAVY_MODULES, SCRAPER_COMMANDS, import_profile
+from webapp import api, views
+from webapp.models import FeedEntry, NewsArticle, SectionVersion, StorySignature, Thumbnail, TitleClassification
+from webapp.pagination import decode_cursor, encode_cursor, keyset_paginate
+from webapp.search import MAX_PAGE, fts5_query, search
+from webapp.section_cache import bump_version, page_key
+
+BASE_URL = 'https://www.bbc.com'
+
+
+def original_extract(content, image_attrs=('data-src', 'src'), filter_placeholders=False):
+    """The extraction of the original scraper commands, on a full `html.parser` tree."""
+    soup = BeautifulSoup(content, 'html.parser')
+    title = None
+    for selector in ['h3', 'h1']:
+        tag = soup.select_one(selector)
+        if tag and tag.text.strip():
+            title = tag.text.strip()
+            break
+    image_url = None
+    for selector in ['img', 'meta[property="og:image"]']:
+        tag = soup.select_one(selector)
+        if tag:
+            if selector == 'img':
+                image_url = next((tag.get(attr) for attr in image_attrs if tag.get(attr)), None)
+            else:
+                image_url = tag.get('content')
+            if image_url:
+                break
+    if image_url and not image_url.startswith('http'):
+        image_url = f"{BASE_URL}{image_url}"
+    if filter_placeholders and image_url and not is_valid_image_url(image_url):
+        image_url = None
+    summary_tag = soup.select_one('p')
+    summary = summary_tag.text.strip() if summary_tag else "No Summary Available"
+    return title or NO_TITLE, image_url, summary
+
+
+# Malformed markup on which a strained or repaired tree could differ from the original one
+EDGE_CASES = [
+    '<p>Hello <b>world</b><div>block</div> tail</p>',
+    '<h3><p>inner</p></h3>',
+    '<div><h3>Title</div><p>x</p>',
+    '<section><h3>T</section><div><p>a</p></div>',
+    '<div><p>a</div>b</p>',
+    '<table><p>x</table><h1>y</h1>',
+    '<h3><!-- comment --></h3><h1>Heading</h1><script>var p = "<p>";</script>',
+    '<p><script>var a = "<p>"</script>x</p>',
+    '<h3>x<style>y</style></h3>',
+    '<img src="/a.jpg"><meta property="og:image" content="https://x/og.jpg">',
+    '<img src=""><meta property="og:image" content="/og.jpg"><p>x',
+    '<img data-src="/grey-placeholder.png" src="/real.jpg"><br/><div/><h1>t',
+    '',
+]
+
+
+def random_markup(rng):
+    tags = ['div', 'p', 'h1', 'h3', 'span', 'b', 'section', 'td', 'img', 'meta', 'br', 'script', 'a']
+    parts = []
+    for _ in range(rng.randint(1, 25)):
+        tag, draw = rng.choice(tags), rng.random()
+        if draw < 0.45:
+            parts.append({
+                'img': f'<img src="/i{rng.randint(0, 9)}.jpg">',
+                'meta': '<meta property="og:image" content="/og.jpg">',
+            }.get(tag, f'<{tag}>'))
+        elif draw < 0.8:
+            parts.append(f'</{tag}>')
+        else:
+            parts.append(rng.choice(['text', 'hello ', ' y ', '<!-- c -->', '<br/>', '<div/>']))
+    return ''.join(parts)
+
+
+class ExtractArticleTests(SimpleTestCase):
+    def assertMatchesOriginal(self, content, **options):
+        self.assertEqual(
+            extract_article(content, BASE_URL, engine='html.parser', **options),
+            original_extract(content, **options),
+            msg=content[:200],
+        )
+
+    def test_fixtures_match_original(self):
+        site = StandInSite(state_size=2000)
+        for number, name in enumerate(ARTICLE_FIXTURES * 5):
+            page = site.article_page(f'/news/articles/test-{number}', random.Random(number)).encode()
+            with self.subTest(fixture=name, page=number):
+                self.assertMatchesOriginal(page)
+                self.assertMatchesOriginal(page, filter_placeholders=True)
+                self.assertMatchesOriginal(page, image_attrs=('data-src', 'src', 'srcset'))
+
+    def test_malformed_markup_matches_original(self):
+        for content in EDGE_CASES:
+            with self.subTest(content=content):
+                self.assertMatchesOriginal(content)
+                self.assertMatchesOriginal(content, filter_placeholders=True)
+
+    def test_random_markup_matches_original(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            self.assertMatchesOriginal(random_markup(rng))
+
+    def test_lxml_engine_matches_on_well_formed_pages(self):
+        site = StandInSite(state_size=2000)
+        for number in range(10):
+            page = site.article_page(f'/news/articles/test-{number}', random.Random(number)).encode()
+            self.assertEqual(extract_article(page, BASE_URL, engine='lxml'), original_extract(page))
+
+
+class StandInSiteTests(SimpleTestCase):
+    def test_pages_are_generated_from_their_path(self):
+        site = StandInSite(articles_per_section=5, state_size=200)
+        status, first, _ = site.respond('/news/articles/abc')
+        self.assertEqual(status, 200)
+        self.assertEqual(site.respond('/news/articles/abc')[1], first)
+        self.assertNotEqual(site.respond('/news/articles/xyz')[1], first)
+
+        links = [href for href, *_ in site.cards('/news')]
+        self.assertEqual(len(links), 5)
+        self.assertTrue(all(link in site.respond('/news')[1] for link in links))
+        self.assertTrue(all(link in site.respond(feed_path('/news'))[1] for link in links))
+
+    def test_etags_answer_304(self):
+        site = StandInSite(state_size=200, etags=True)
+        _, _, headers = site.respond('/news/articles/abc')
+        self.assertEqual(site.respond('/news/articles/abc', if_none_match=headers['ETag'])[0], 304)
+        self.assertEqual(site.respond('/news/articles/abc', if_none_match='"stale"')[0], 200)
+        self.assertNotIn('ETag', StandInSite(state_size=200).respond('/news/articles/abc')[2])
+
+    def test_throttles_beyond_capacity(self):
+        site = StandInSite(state_size=200, capacity=2, retry_after=7)
+        self.assertEqual(site.respond('/news/articles/abc', load=2)[0], 200)
+        status, _, headers = site.respond('/news/articles/abc', load=3)
+        self.assertEqual((status, headers['Retry-After']), (429, '7'))
+
+    def test_serves_over_http(self):
+        site = StandInSite(state_size=200, error_rate=1.0)
+        base_url = site.start()
+        self.addCleanup(site.stop)
+        self.assertEqual(requests.get(f'{base_url}{feed_path("/news")}', timeout=5).status_code, 200)
+        self.assertEqual(requests.get(f'{base_url}/news/articles/abc', timeout=5).status_code, 500)
+        self.assertEqual(dict(site.statuses), {200: 1, 500: 1})
+
+
+class StandInTestCase(TestCase):
+    """Runs against a fresh stand-in site, with the stub classifier and backoff short enough for tests."""
+
+    site_options = {}
+
+    def setUp(self):
+        self.site = StandInSite(articles_per_section=6, state_size=200, **self.site_options)
+        base_url = self.site.start()
+        self.addCleanup(self.site.stop)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(
+            CRAWLER_BASE_URL=base_url,
+            CRAWLER_CACHE_DIR=cache_dir.name,
+            CRAWLER_FEEDS={section.name: [feed_path(section.path)] for section in SECTIONS.values()},
+            CRAWLER_BACKOFF_BASE=0.01,
+            CRAWLER_BACKOFF_MAX=0.05,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        previous = set_classifier(StubClassifier())
+        self.addCleanup(set_classifier, previous)
+        get_classification_cache().clear()
+        get_rate_controller().reset()
+        self.addCleanup(get_rate_controller().reset)
+
+    def crawl(self, *names, **options):
+        crawler = Crawler(StringIO(), StringIO(), thumbnails=False, quiet=True, **options)
+        with self.captureOnCommitCallbacks(execute=True):
+            crawler.crawl([SECTIONS[name] for name in names])
+        return crawler
+
+    def counter(self, crawler, name, **labels):
+        return sum(
+            sample['value'] for sample in crawler.metrics.report()['counters'].get(name, [])
+            if all(sample.get(key) == value for key, value in labels.items())
+        )
+
+
+class FeedDiscoveryTests(StandInTestCase):
+    site_options = {'feed_image_rate': 1.0}
+
+    def test_complete_feed_items_are_stored_without_fetching_their_pages(self):
+        crawler = self.crawl('news')
+        self.assertEqual(self.site.requests, 1)  # The feed only
+        self.assertEqual(self.counter(crawler, 'discovered_total', source='feed'), 6)
+        stored = NewsArticle.objects.all()
+        self.assertEqual(len(stored), 6)
+        self.assertTrue(all(article.news_link.startswith(SECTIONS['news'].base_url) for article in stored))
+        self.assertTrue(all(article.news_image_url and article.news_source_published_at for article in stored))
+
+    def test_section_page_is_scraped_without_a_usable_feed(self):
+        with override_settings(CRAWLER_FEEDS={'news': ['/feeds/missing.xml']}):
+            crawler = self.crawl('news')
+        self.assertEqual(self.counter(crawler, 'discovered_total', source='feed'), 0)
+        self.assertEqual(self.counter(crawler, 'discovered_total', source='page'), NewsArticle.objects.count())
+        self.assertGreaterEqual(NewsArticle.objects.count(), 6)
+
+    def test_anchors_discovery_ignores_the_feeds(self):
+        crawler = self.crawl('news', discovery='anchors')
+        self.assertEqual(self.counter(crawler, 'discovered_total', source='feed'), 0)
+        self.assertEqual(self.counter(crawler, 'discovered_total', source='page'), NewsArticle.objects.count())
+
+
+class ValidatorCacheTests(SimpleTestCase):
+    URL = 'https://feeds.example.com/news/rss.xml'
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CRAWLER_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def response(self, etag):
+        return SimpleNamespace(headers={'ETag': etag})
+
+    def test_only_sections_that_stored_a_version_send_its_validators(self):
+        ValidatorCache('home').store(self.URL, self.response('"v1"'))
+        self.assertEqual(ValidatorCache('home').headers(self.URL), {'If-None-Match': '"v1"'})
+        self.assertEqual(ValidatorCache('news').headers(self.URL), {})
+
+        ValidatorCache('news').store(self.URL, self.response('"v1"'))
+        self.assertEqual(ValidatorCache('home').headers(self.URL), {'If-None-Match': '"v1"'})
+        self.assertEqual(ValidatorCache('news').headers(self.URL), {'If-None-Match': '"v1"'})
+
+        # A new version is only known to the section that stored it
+        ValidatorCache('news').store(self.URL, self.response('"v2"'))
+        self.assertEqual(ValidatorCache('home').headers(self.URL), {})
+        self.assertEqual(ValidatorCache('news').headers(self.URL), {'If-None-Match': '"v2"'})
+
+    def test_deferred_validators_are_written_on_commit(self):
+        cache = ValidatorCache('news', deferred=True)
+        cache.store(self.URL, self.response('"v1"'))
+        self.assertEqual(ValidatorCache('news').headers(self.URL), {})
+        cache.commit(self.URL)
+        self.assertEqual(ValidatorCache('news').headers(self.URL), {'If-None-Match': '"v1"'})
+        self.assertEqual(cache.pending, {})
+
+    def test_one_file_per_url(self):
+        for section in SECTIONS:
+            ValidatorCache(section).store(self.URL, self.response('"v1"'))
+        ValidatorCache('news').store(f'{self.URL}?page=2', self.response('"v1"'))
+        self.assertEqual(len(os.listdir(settings.CRAWLER_CACHE_DIR)), 2)
+
+
+class ConditionalFetchTests(StandInTestCase):
+    site_options = {'etags': True, 'feed_image_rate': 0.0}
+
+    def test_unchanged_feed_is_answered_304(self):
+        self.crawl('news')
+        requests_before = self.site.requests
+        second = self.crawl('news')
+        self.assertEqual(self.counter(second, 'http_responses_total', status=304), 1)
+        self.assertEqual(self.site.requests - requests_before, 1)  # No article page is fetched
+
+        third = self.crawl('news', ignore_cache=True)
+        self.assertEqual(self.counter(third, 'http_responses_total', status=304), 0)
+
+    def test_unchanged_section_page_is_answered_304(self):
+        self.crawl('news', discovery='anchors')
+        second = self.crawl('news', discovery='anchors')
+        self.assertEqual(self.counter(second, 'http_responses_total', status=304), 1)
+        self.assertEqual(self.counter(second, 'discovered_total', source='page'), 0)
+
+    def test_feed_shared_by_sections_is_not_skipped_for_the_second(self):
+        with override_settings(CRAWLER_FEEDS={'home': [feed_path('/news')], 'news': [feed_path('/news')]}):
+            self.crawl('home')
+            news = self.crawl('news')
+            self.assertEqual(self.counter(news, 'http_responses_total', status=304), 0)
+            self.assertEqual(NewsArticle.objects.count(), 6)
+            self.assertEqual(self.counter(self.crawl('home'), 'http_responses_total', status=304), 1)
+            self.assertEqual(self.counter(self.crawl('news'), 'http_responses_total', status=304), 1)
+
+    def test_feed_is_fetched_again_after_a_failed_chunk(self):
+        with mock.patch.object(NewsArticle.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            failed = self.crawl('news')
+        self.assertGreater(self.counter(failed, 'errors_total', stage='write'), 0)
+
+        retried = self.crawl('news')
+        self.assertEqual(self.counter(retried, 'http_responses_total', status=304), 0)
+        self.assertEqual(NewsArticle.objects.count(), 6)
+
+    def test_feed_is_fetched_again_after_an_early_stop(self):
+        stop = threading.Event()
+        crawler = Crawler(StringIO(), StringIO(), thumbnails=False, quiet=True, workers=1, stop=stop)
+        record_response = crawler.record_response
+        recorded = []
+
+        def stop_after_two_articles(response):
+            record_response(response)
+            recorded.append(response)
+            if len(recorded) == 3:  # The feed and two articles
+                stop.set()
+
+        crawler.record_response = stop_after_two_articles
+        with self.captureOnCommitCallbacks(execute=True):
+            crawler.crawl([SECTIONS['news']])
+        self.assertLess(NewsArticle.objects.count(), 6)
+
+        resumed = self.crawl('news')
+        self.assertEqual(self.counter(resumed, 'http_responses_total', status=304), 0)
+        self.assertEqual(NewsArticle.objects.count(), 6)
+        # Every listed article is stored now, so the feed's validators were kept
+        self.assertEqual(self.counter(self.crawl('news'), 'http_responses_total', status=304), 1)
+
+
+class KnownLinksTests(TestCase):
+    def link(self, number):
+        return f'{BASE_URL}/news/articles/{number}'
+
+    def store(self, *numbers):
+        section = SECTIONS['news']
+        for number in numbers:
+            section.build(f'Title {number}', self.link(number), None, 'Summary').save()
+
+    def test_membership(self):
+        self.store(*range(50))
+        known = KnownLinks.load(NewsArticle, 'news_link', chunk_size=7)
+        self.assertEqual(len(known), 50)
+        self.assertTrue(all(self.link(number) in known for number in range(50)))
+        self.assertFalse(any(self.link(number) in known for number in range(50, 100)))
+        self.assertNotIn(f'{self.link(1)}?at=1', known)
+
+    def test_empty_table(self):
+        known = KnownLinks.load(NewsArticle, 'news_link')
+        self.assertEqual(len(known), 0)
+        self.assertNotIn(self.link(1), known)
+
+    def test_links_stored_after_loading_are_seen_by_the_next_load(self):
+        self.store(1)
+        known = KnownLinks.load(NewsArticle, 'news_link')
+        self.store(2)
+        self.assertNotIn(self.link(2), known)
+        self.assertIn(self.link(2), KnownLinks.load(NewsArticle, 'news_link'))
+
+    def test_digests_are_deduplicated_and_sorted(self):
+        links = [self.link(number) for number in [3, 1, 2, 1]]
+        known = KnownLinks(link_digest(link) for link in links)
+        self.assertEqual(len(known), 3)
+        self.assertEqual(list(known._digests), sorted({link_digest(link) for link in links}))
+
+
+class IncrementalCrawlTests(StandInTestCase):
+    def test_stored_links_are_skipped_before_fetching(self):
+        first = self.crawl('news', discovery='anchors')
+        stored = NewsArticle.objects.count()
+        self.assertEqual(self.counter(first, 'skipped_total', reason='stored'), 0)
+
+        requests_before = self.site.requests
+        second = self.crawl('news', discovery='anchors')
+        self.assertEqual(self.counter(second, 'skipped_total', reason='stored'), stored)
+        self.assertEqual(self.site.requests - requests_before, 1)  # The section page only
+        self.assertEqual(NewsArticle.objects.count(), stored)
+
+        refreshed = self.crawl('news', discovery='anchors', refresh=True)
+        self.assertEqual(self.counter(refreshed, 'articles_total', outcome='updated'), stored)
+
+
+class HostControllerTests(SimpleTestCase):
+    def test_limit_grows_additively_and_halves_on_throttling(self):
+        host = HostController(8)
+        self.assertEqual(host.limit, 4)
+        for _ in range(8):
+            host.acquire()
+            host.release(200, 0.01)
+        self.assertGreater(host.limit, 5)
+        grown = host.limit
+        host.acquire()
+        host.release(429, 0.01)
+        self.assertAlmostEqual(host.limit, grown * DECREASE)
+        host.acquire()
+        host.release(503, 0.01)  # The same round trip: not cut twice
+        self.assertAlmostEqual(host.limit, grown * DECREASE)
+
+    def test_slow_responses_cut_the_limit(self):
+        host = HostController(8)
+        for _ in range(10):
+            host.acquire()
+            host.release(200, 0.06)
+        limit = host.limit
+        host.acquire()
+        host.release(200, 5.0)
+        self.assertLess(host.limit, limit)
+
+    @override_settings(CRAWLER_BACKOFF_MAX=0.2)
+    def test_retry_after_is_capped_and_a_stop_ends_the_wait(self):
+        host = HostController(4)
+        host.acquire()
+        host.release(429, 0.01, retry_after=3600)
+        self.assertLessEqual(host.paused_until - time.monotonic(), 0.2)
+
+        stop = threading.Event()
+        stop.set()
+        with self.assertRaises(Stopped):
+            host.acquire(stop)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+
+class ThrottlingTests(StandInTestCase):
+    site_options = {'capacity': 2, 'retry_after': 0, 'latency': 0.02}
+
+    def urls(self, count):
+        return [f"{settings.CRAWLER_BASE_URL}/news/articles/throttle-{number}" for number in range(count)]
+
+    @override_settings(CRAWLER_RETRIES=10)
+    def test_throttled_requests_are_retried_until_served(self):
+        retries = []
+        fetched = fetch_all(self.urls(30), workers=8, per_host=8, on_retry=lambda url, reason: retries.append(reason))
+        self.assertEqual([future.result().status_code for _, future in fetched], [200] * 30)
+        self.assertGreater(self.site.statuses[429], 0)
+        self.assertEqual(len(retries), self.site.statuses[429])
+
+
+class CircuitBreakerTests(StandInTestCase):
+    site_options = {'error_rate': 1.0}
+
+    @override_settings(CRAWLER_RETRIES=0, CRAWLER_BREAKER_WINDOW=10, CRAWLER_BREAKER_COOLDOWN=0.1)
+    def test_breaker_opens_on_a_failing_host_and_a_probe_closes_it(self):
+        get_rate_controller().reset()  # Host controllers read the window when created
+        urls = [f"{settings.CRAWLER_BASE_URL}/news/articles/failing-{number}" for number in range(30)]
+        outcomes = []
+        for url in urls:
+            try:
+                outcomes.append(fetch(url, per_host=4).status_code)
+            except CircuitOpen:
+                outcomes.append('open')
+        self.assertEqual(outcomes[:10], [500] * 10)
+        self.assertEqual(set(outcomes[10:]), {'open'})
+        self.assertEqual(self.site.requests, 10)
+
+        self.site.error_rate = 0.0
+        time.sleep(0.15)
+        self.assertEqual(fetch(urls[0], per_host=4).status_code, 200)
+        self.assertFalse(next(iter(get_rate_controller().state().values()))['open'])
+
+class RecordingClassifier(StubClassifier):
+    """A stub that labels each title by its length and records the size of every call."""
+
+    def __init__(self, fail_on=()):
+        super().__init__()
+        self.calls = []
+        self.fail_on = set(fail_on)
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        texts = [texts] if isinstance(texts, str) else texts
+        self.calls.append(len(texts))
+        if self.fail_on & set(texts):
+            raise RuntimeError('bad title')
+        return [{'label': f'LABEL_{len(text)}', 'score': 1.0} for text in texts]
+
+
+class ClassifyTitlesTests(SimpleTestCase):
+    def test_titles_are_classified_in_batches_and_in_order(self):
+        classifier = RecordingClassifier()
+        titles = ['a' * length for length in range(1, 11)]
+        labels = classify_titles(titles, classifier=classifier, batch_size=4)
+        self.assertEqual(labels, [f'LABEL_{len(title)}' for title in titles])
+        self.assertEqual(classifier.calls, [4, 4, 2])
+
+    def test_a_failed_batch_is_retried_title_by_title(self):
+        classifier = RecordingClassifier(fail_on={'bad'})
+        errors = []
+        labels = classify_titles(['one', 'bad', 'three'], classifier=classifier, batch_size=8, on_error=errors.append)
+        self.assertEqual(labels, ['LABEL_3', UNKNOWN_LABEL, 'LABEL_5'])
+        self.assertEqual(classifier.calls, [3, 1, 1, 1])
+        self.assertEqual(len(errors), 1)
+
+    def test_titles_differing_in_case_or_spacing_are_classified_once(self):
+        classifier = RecordingClassifier()
+        labels = classify_titles(['Storm  hits', 'storm hits', 'STORM HITS '], classifier=classifier)
+        self.assertEqual(classifier.calls, [1])
+        self.assertEqual(len(set(labels)), 1)
+
+    def test_no_titles(self):
+        classifier = RecordingClassifier()
+        self.assertEqual(classify_titles([], classifier=classifier), [])
+        self.assertEqual(classifier.calls, [])
+
+
+class LazyClassifierTests(SimpleTestCase):
+    def setUp(self):
+        previous = set_classifier(None)
+        self.addCleanup(set_classifier, previous)
+
+    def test_pipeline_is_loaded_once_on_first_use(self):
+        transformers = SimpleNamespace(pipeline=mock.Mock(return_value=RecordingClassifier()))
+        with mock.patch.dict(sys.modules, {'transformers': transformers}):
+            first = get_classifier()
+            self.assertIs(get_classifier(), first)
+        transformers.pipeline.assert_called_once_with('text-classification', model=MODEL_NAME)
+
+    def test_cached_titles_never_load_the_pipeline(self):
+        cache = mock.Mock(get_many=lambda titles: dict.fromkeys(titles, 'LABEL_0'))
+        with mock.patch('webapp.crawler.classify.get_classifier') as loader:
+            self.assertEqual(classify_titles(['One', 'Two'], cache=cache), ['LABEL_0', 'LABEL_0'])
+        loader.assert_not_called()
+
+    def test_set_classifier_returns_the_previous_one(self):
+        stub = StubClassifier()
+        self.assertIsNone(set_classifier(stub))
+        self.assertIs(get_classifier(), stub)
+        self.assertIs(set_classifier(None), stub)
+
+    def test_crawl_commands_do_not_import_the_model_at_startup(self):
+        self.assertIn('crawl_all', SCRAPER_COMMANDS)
+        for name in ['news', 'crawl_all']:
+            cumulative, imported = import_profile(f'webapp.management.commands.{name}')
+            self.assertIsNotNone(cumulative)
+            self.assertFalse(HEAVY_MODULES & imported, name)
+
+
+class ClassificationCacheTests(TestCase):
+    def test_memory_tier_evicts_the_least_recently_used(self):
+        cache = ClassificationCache(size=2)
+        cache.set_many({'First': 'LABEL_1', 'Second': 'LABEL_2'})
+        cache.get_many(['First'])
+        cache.set_many({'Third': 'LABEL_3'})
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get_many(['First', 'Third']), {'First': 'LABEL_1', 'Third': 'LABEL_3'})
+        with self.assertNumQueries(2):  # Read from the table, and marked as used
+            self.assertEqual(cache.get_many(['Second']), {'Second': 'LABEL_2'})
+
+    def test_labels_outlive_the_process_and_are_keyed_by_model(self):
+        ClassificationCache().set_many({'Storm hits coast': 'LABEL_1'})
+        self.assertEqual(ClassificationCache().get_many(['storm  HITS coast']), {'storm  HITS coast': 'LABEL_1'})
+        self.assertEqual(ClassificationCache(model_name='other-model').get_many(['Storm hits coast']), {})
+
+    def test_classified_titles_skip_the_model_next_time(self):
+        classifier = RecordingClassifier()
+        classify_titles(['One', 'Two'], classifier=classifier, cache=ClassificationCache())
+        labels = classify_titles(['One', 'Two', 'Three'], classifier=classifier, cache=ClassificationCache())
+        self.assertEqual(labels, ['LABEL_3', 'LABEL_3', 'LABEL_5'])
+        self.assertEqual(classifier.calls, [2, 1])
+
+    def test_prune_drops_other_models_and_the_oldest_rows(self):
+        cache = ClassificationCache(max_rows=2)
+        cache.set_many({f'Title {number}': 'LABEL_0' for number in range(4)})
+        ClassificationCache(model_name='other-model').set_many({'Old title': 'LABEL_0'})
+        now = timezone.now()
+        for number in range(4):
+            TitleClassification.objects.filter(key=title_key(f'Title {number}')).update(
+                last_used_at=now - timedelta(minutes=number),
+            )
+        cache.prune()
+        self.assertCountEqual(
+            TitleClassification.objects.values_list('key', flat=True),
+            [title_key('Title 0'), title_key('Title 1')],
+        )
+
+    def test_clear_classification_cache_command(self):
+        ClassificationCache().set_many({'One': 'LABEL_0'})
+        ClassificationCache(model_name='other-model').set_many({'Two': 'LABEL_0'})
+        out = StringIO()
+        call_command('clear_classification_cache', '--stale', stdout=out)
+        self.assertEqual(out.getvalue().strip(), '1 cached classifications removed.')
+        self.assertEqual(TitleClassification.objects.get().model_name, MODEL_NAME)
+
+        get_classification_cache().set_many({'One': 'LABEL_0'})
+        call_command('clear_classification_cache', stdout=StringIO())
+        self.assertFalse(TitleClassification.objects.exists())
+        self.assertEqual(get_classification_cache().get_many(['One']), {})
+
+
+class CrawlClassificationTests(StandInTestCase):
+    def test_cache_is_pruned_once_per_crawl(self):
+        with mock.patch.object(ClassificationCache, 'prune') as prune:
+            self.crawl('news', 'sports', chunk_size=2)
+        prune.assert_called_once_with()
+        self.assertEqual(set(NewsArticle.objects.values_list('news_category', flat=True)), {STUB_LABEL})
+
+
+class CrawlOutputTests(StandInTestCase):
+    def test_each_section_prints_its_image_lines(self):
+        stdout = StringIO()
+        crawler = Crawler(OutputWrapper(stdout), StringIO(), thumbnails=False, discovery='anchors')
+        with self.captureOnCommitCallbacks(execute=True):
+            crawler.crawl([SECTIONS['home'], SECTIONS['news']])
+        lines = stdout.getvalue().splitlines()
+        fetched = len(lines) - 2  # Less the two section reports
+        self.assertEqual(fetched, 2 * NewsArticle.objects.count())
+        # Both sections link to the same articles, each fetched once and reported in both formats
+        self.assertEqual(len([line for line in lines if line.startswith('Image URL: ')]), fetched / 2)
+        self.assertEqual(len([line for line in lines if line.startswith(('Image Found: ', 'No image found for '))]),
+                         fetched / 2)
+
+    def test_image_message_matches_the_original_commands(self):
+        link = f'{BASE_URL}/news/articles/1'
+        self.assertEqual(SECTIONS['home'].image_message('https://x/a.jpg', link), 'Image URL: https://x/a.jpg')
+        self.assertEqual(SECTIONS['home'].image_message(None, link), 'Image URL: No image found')
+        self.assertEqual(SECTIONS['news'].image_message('https://x/a.jpg', link), 'Image Found: https://x/a.jpg')
+        self.assertEqual(SECTIONS['news'].image_message(None, link), f'No image found for {link}')
+
+
+class CrawlMetricsTests(SimpleTestCase):
+    def metrics(self):
+        metrics = CrawlMetrics('news')
+        for seconds in [0.01, 0.2, 30]:
+            metrics.observe('fetch_seconds', seconds)
+        metrics.increment('http_responses_total', 2, status=200)
+        metrics.increment('http_responses_total', status=404)
+        metrics.increment('articles_total', 3, section='news', outcome='inserted')
+        metrics.increment('articles_total', 0, section='news', outcome='failed')
+        metrics.finish()
+        return metrics
+
+    def test_report(self):
+        report = json.loads(json.dumps(self.metrics().report()))
+        self.assertEqual(report['crawl'], 'news')
+        self.assertIsNotNone(report['finished_at'])
+        fetch = report['histograms']['fetch_seconds']
+        self.assertEqual((fetch['count'], fetch['buckets']['0.05'], fetch['buckets']['10'], fetch['buckets']['+Inf']),
+                         (3, 1, 2, 3))
+        self.assertEqual(report['histograms']['parse_seconds']['mean'], None)
+        self.assertEqual(report['counters']['http_responses_total'], [
+            {'status': 200, 'value': 2}, {'status': 404, 'value': 1},
+        ])
+        self.assertEqual(report['counters']['articles_total'], [{'outcome': 'inserted', 'section': 'news', 'value': 3}])
+        self.assertAlmostEqual(report['articles_per_second'] * report['duration_seconds'], 3)
+
+    def test_prometheus(self):
+        lines = self.metrics().prometheus().splitlines()
+        self.assertIn('# TYPE crawler_fetch_seconds histogram', lines)
+        self.assertIn('crawler_fetch_seconds_bucket{crawl="news",le="0.25"} 2', lines)
+        self.assertIn('crawler_fetch_seconds_bucket{crawl="news",le="+Inf"} 3', lines)
+        self.assertIn('crawler_fetch_seconds_count{crawl="news"} 3', lines)
+        self.assertIn('crawler_http_responses_total{crawl="news",status="404"} 1', lines)
+        self.assertIn('crawler_articles_total{crawl="news",outcome="inserted",section="news"} 3', lines)
+        self.assertIn('# TYPE crawler_run_duration_seconds gauge', lines)
+        self.assertFalse([line for line in lines if 'outcome="failed"' in line])
+
+
+class MetricsReportTests(StandInTestCase):
+    def test_command_writes_the_report_and_textfile(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        json_path = os.path.join(directory.name, 'reports', '{crawl}.json')
+        textfile_path = os.path.join(directory.name, '{crawl}.prom')
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('news', '--quiet', '--no-thumbnails', metrics_json=json_path,
+                         metrics_textfile=textfile_path, stdout=out, stderr=StringIO())
+
+        with open(json_path.format(crawl='news')) as fh:
+            report = json.load(fh)
+        inserted = sum(sample['value'] for sample in report['counters']['articles_total']
+                       if sample['outcome'] == 'inserted')
+        self.assertEqual(inserted, NewsArticle.objects.count())
+        self.assertGreater(report['histograms']['fetch_seconds']['count'], 0)
+        self.assertGreater(report['histograms']['parse_seconds']['count'], 0)
+        self.assertNotIn('Image', out.getvalue())
+
+        with open(textfile_path.format(crawl='news')) as fh:
+            textfile = fh.read()
+        self.assertIn(f'crawler_articles_total{{crawl="news",outcome="inserted",section="news"}} {inserted}', textfile)
+        # Written under a temporary name and renamed, so nothing else is left behind
+        self.assertEqual(sorted(os.listdir(directory.name)), ['news.prom', 'reports'])
+
+
+class CrawlSchedulerTests(TestCase):
+    def schedule(self, *args, runs=3, fail=()):
+        """Run the scheduler until `runs` crawls have started, then stop it as SIGTERM would."""
+        command = SchedulerCommand()
+        command.out, command.err = StringIO(), StringIO()
+        handlers = {}
+        crawls = []
+
+        def crawl(sections, options):
+            crawls.append((sections[0].name, options))
+            if len(crawls) >= runs:
+                handlers[signal.SIGTERM](signal.SIGTERM, None)
+            if sections[0].name in fail:
+                raise RuntimeError('boom')
+
+        with mock.patch('signal.signal', side_effect=lambda signum, handler: handlers.setdefault(signum, handler)), \
+                mock.patch.object(command, 'crawl', side_effect=crawl):
+            call_command(command, *args, '--no-warm', '--jitter', '0', stdout=command.out, stderr=command.err)
+        return command, crawls
+
+    def test_sections_are_crawled_on_their_intervals_until_stopped(self):
+        command, crawls = self.schedule('news', 'sports', '--interval', 'news=0.05', '--interval', 'sports=60', runs=3)
+        self.assertEqual([name for name, _ in crawls], ['news', 'sports', 'news'])
+        self.assertTrue(command.stopping.is_set())
+        output = command.out.getvalue()
+        self.assertIn('Scheduling news every 0.05s, sports every 60s, at most 2 at a time.', output)
+        self.assertTrue(output.endswith('Scheduler stopped.\n'))
+
+    def test_a_failed_crawl_is_reported_and_retried(self):
+        command, crawls = self.schedule('news', '--interval', 'news=0.05', runs=2, fail={'news'})
+        self.assertEqual([name for name, _ in crawls], ['news', 'news'])
+        self.assertIn('Crawl of news failed', command.err.getvalue())
+
+    def test_crawlers_share_the_stop_event(self):
+        command = SchedulerCommand()
+        command.stopping = threading.Event()
+        options = {'workers': 1, 'per_host': 1, 'refresh': False, 'ignore_cache': False, 'batch_size': 1,
+                   'torch_threads': None, 'chunk_size': 1, 'duplicates': 'keep', 'quiet': True, 'no_thumbnails': True,
+                   'discovery': 'feeds'}
+        self.assertIs(command.get_crawler(**options).stop, command.stopping)
+
+    def test_intervals_are_validated(self):
+        self.assertEqual(parse_interval('news=90'), ('news', 90.0))
+        for value in ['news', 'weather=60', 'news=soon', 'news=0']:
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                parse_interval(value)
+        with self.assertRaisesMessage(CommandError, 'No interval for news'):
+            with override_settings(CRAWLER_SCHEDULE={}):
+                call_command('crawl_scheduler', 'news', '--no-warm')
+
+
+class ArticleWriterTests(TestCase):
+    def setUp(self):
+        self.section = SECTIONS['news']
+        self.saved = []
+
+    def writer(self, **options):
+        return ArticleWriter(self.section, on_saved=lambda section, links: self.saved.extend(links), **options)
+
+    def build(self, number, title='Title'):
+        return self.section.build(f'{title} {number}', f'{BASE_URL}/news/articles/{number}', None, 'Summary')
+
+    def test_counts_inserts_and_skips_existing_and_repeated_links(self):
+        writer = self.writer()
+        with self.captureOnCommitCallbacks(execute=True):
+            writer.write([self.build(1), self.build(2)])
+            writer.write([self.build(2), self.build(3), self.build(3)])
+        self.assertEqual((writer.inserted, writer.updated, writer.skipped, writer.failed), (3, 0, 2, 0))
+        self.assertEqual(self.section.model.objects.count(), 3)
+        self.assertEqual(FeedEntry.objects.filter(section='news').count(), 3)
+        self.assertCountEqual(self.saved, [self.build(number).news_link for number in [1, 2, 2, 3]])
+
+    def test_update_rewrites_existing_rows_and_their_feed_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer().write([self.build(1)])
+            writer = self.writer(update=True)
+            writer.write([self.build(1, title='Changed')])
+        self.assertEqual((writer.inserted, writer.updated), (0, 1))
+        self.assertEqual(self.section.model.objects.get().news_title, 'Changed 1')
+        self.assertEqual(FeedEntry.objects.get().title, 'Changed 1')
+
+    def test_near_duplicates_are_kept_out_of_the_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer().write([self.build(1), self.build(2)], duplicates={self.build(2).news_link})
+        self.assertEqual(self.section.model.objects.count(), 2)
+        self.assertEqual(list(FeedEntry.objects.values_list('link', flat=True)), [self.build(1).news_link])
+
+    def test_failed_chunk_is_counted_and_not_reported_saved(self):
+        writer = self.writer()
+        with mock.patch.object(self.section.model.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            with self.captureOnCommitCallbacks(execute=True):
+                writer.write([self.build(1), self.build(2)])
+        self.assertEqual((writer.inserted, writer.failed), (0, 2))
+        self.assertEqual(self.saved, [])
+        self.assertFalse(self.section.model.objects.exists())
+
+
+class StoryIndexTests(TestCase):
+    TITLE = 'Storm brings floods to coastal villages as rivers burst their banks'
+    SUMMARY = 'Hundreds of homes were evacuated overnight after heavy rain across the region.'
+
+    def test_finds_a_stored_near_duplicate(self):
+        index = StoryIndex(min_similarity=0.6)
+        original = Story(f'{BASE_URL}/news/articles/1', story_signature(self.TITLE, self.SUMMARY), 'Weather')
+        index.add([original])
+
+        retold = story_signature(self.TITLE.replace('villages', 'towns'), self.SUMMARY)
+        candidates = index.candidates([retold])
+        self.assertEqual([story.link for story in candidates], [original.link])
+        found = index.find(retold, f'{BASE_URL}/news/articles/2', candidates)
+        self.assertEqual((found.link, found.category), (original.link, 'Weather'))
+
+    def test_ignores_unrelated_stories_and_the_same_link(self):
+        index = StoryIndex(min_similarity=0.6)
+        signature = story_signature(self.TITLE, self.SUMMARY)
+        index.add([Story(f'{BASE_URL}/news/articles/1', signature, 'Weather')])
+
+        unrelated = story_signature('Central bank holds interest rates', 'Inflation eased for a third month.')
+        self.assertIsNone(index.find(unrelated, f'{BASE_URL}/news/articles/2', index.candidates([unrelated])))
+        self.assertIsNone(index.find(signature, f'{BASE_URL}/news/articles/1', index.candidates([signature])))
+
+    def test_signatures(self):
+        signature = story_signature(self.TITLE, self.SUMMARY)
+        self.assertEqual(similarity(signature, story_signature(self.TITLE, self.SUMMARY)), 1.0)
+        self.assertIsNone(story_signature(NO_TITLE, self.SUMMARY))
+        self.assertEqual(len(band_keys(signature)), len(set(band_keys(signature))))
+
+
+class DuplicatePolicyTests(TestCase):
+    def setUp(self):
+        previous = set_classifier(StubClassifier())
+        self.addCleanup(set_classifier, previous)
+        get_classification_cache().clear()
+        self.section = SECTIONS['news']
+
+    def build(self, number, title=StoryIndexTests.TITLE):
+        return self.section.build(title, f'{BASE_URL}/news/articles/{number}', None, StoryIndexTests.SUMMARY)
+
+    def flush(self, articles, duplicates='hide'):
+        crawler = Crawler(StringIO(), StringIO(), duplicates=duplicates, thumbnails=False)
+        writers = {self.section.name: ArticleWriter(self.section)}
+        with self.captureOnCommitCallbacks(execute=True):
+            crawler.flush([(self.section, article) for article in articles], writers)
+        return writers[self.section.name]
+
+    def test_hide_stores_the_copy_out_of_the_feed(self):
+        writer = self.flush([self.build(1), self.build(2)])
+        self.assertEqual((writer.inserted, writer.duplicates), (2, 1))
+        self.assertEqual(list(FeedEntry.objects.values_list('link', flat=True)), [self.build(1).news_link])
+        self.assertEqual(list(StorySignature.objects.values_list('link', flat=True)), [self.build(1).news_link])
+
+    def test_skip_drops_the_copy(self):
+        writer = self.flush([self.build(1), self.build(2)], duplicates='skip')
+        self.assertEqual((writer.inserted, writer.duplicates), (1, 1))
+        self.assertFalse(self.section.model.objects.filter(news_link=self.build(2).news_link).exists())
+
+    def test_keep_stores_both(self):
+        writer = self.flush([self.build(1), self.build(2)], duplicates='keep')
+        self.assertEqual((writer.inserted, writer.duplicates), (2, 0))
+        self.assertEqual(FeedEntry.objects.count(), 2)
+
+    def test_stories_of_a_failed_chunk_are_not_indexed(self):
+        with mock.patch.object(self.section.model.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            failed = self.flush([self.build(1)])
+        self.assertEqual(failed.failed, 1)
+        self.assertFalse(StorySignature.objects.exists())
+
+        # The retelling is not mistaken for a copy of a story that was never stored
+        writer = self.flush([self.build(2)])
+        self.assertEqual((writer.inserted, writer.duplicates), (1, 0))
+        self.assertEqual(list(FeedEntry.objects.values_list('link', flat=True)), [self.build(2).news_link])
+
+
+def png(size=256):
+    buffer = BytesIO()
+    Image.linear_gradient('L').resize((size, size)).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ThumbnailMakerTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name, THUMBNAIL_WIDTHS=[64], THUMBNAIL_MAX_ATTEMPTS=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def serve(self, body, **headers):
+        response = mock.MagicMock(headers={'Content-Type': 'image/png', **headers})
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [body]
+        return mock.patch('webapp.crawler.thumbnails.fetch', return_value=response)
+
+    def test_a_malformed_content_length_is_taken_as_unknown(self):
+        with self.serve(b'image', **{'Content-Length': 'lots'}):
+            self.assertEqual(download(f'{BASE_URL}/image.png', max_bytes=10), b'image')
+        with self.serve(b'x' * 11, **{'Content-Length': 'lots'}), self.assertRaises(InvalidImage):
+            download(f'{BASE_URL}/image.png', max_bytes=10)
+        with self.serve(b'', **{'Content-Length': '11'}), self.assertRaises(InvalidImage):
+            download(f'{BASE_URL}/image.png', max_bytes=10)
+
+    def make(self, results, maker=None):
+        def download(url, *args, **kwargs):
+            if isinstance(results[url], Exception):
+                raise results[url]
+            return results[url]
+
+        maker = maker or ThumbnailMaker(workers=2)
+        with mock.patch('webapp.crawler.thumbnails.download', side_effect=download):
+            return maker.make(list(results))
+
+    def test_each_outcome_is_recorded(self):
+        outcomes = self.make({
+            'ok': png(), 'html': b'<html></html>', 'down': requests.ConnectionError('refused'),
+            'open': CircuitOpen('cooling down'), 'bug': RuntimeError('boom'),
+        })
+        self.assertEqual({status: sorted(urls) for status, urls in outcomes.items()},
+                         {'ok': ['ok'], 'invalid': ['html'], 'failed': ['bug', 'down'], 'skipped': ['open']})
+        self.assertEqual(ThumbnailMaker().summary(outcomes), '1 ok, 1 invalid, 2 failed, 1 skipped')
+        rows = {row.source_url: row for row in Thumbnail.objects.all()}
+        self.assertEqual(sorted(rows), ['bug', 'down', 'html', 'ok'])
+        self.assertEqual((rows['ok'].widths, rows['ok'].attempts), ([64], 1))
+        self.assertEqual(rows['bug'].error, 'RuntimeError: boom')
+
+    def test_failures_are_retried_but_skips_use_no_attempt(self):
+        maker = ThumbnailMaker()
+        for _ in range(3):
+            self.make({'down': requests.ConnectionError('refused'), 'open': CircuitOpen('cooling down')}, maker)
+        self.assertEqual(Thumbnail.objects.get(source_url='down').attempts, 2)
+        self.assertEqual(maker.pending(['down', 'open', 'open', '', None]), ['open'])
+
+    @mock.patch('webapp.crawler.thumbnails.LOOKUP_CHUNK', 2)
+    def test_pending_urls_are_looked_up_in_chunks(self):
+        Thumbnail.objects.create(source_url='url 3', status='ok')
+        with self.assertNumQueries(3):
+            self.assertEqual(ThumbnailMaker().pending([f'url {number}' for number in range(5)]),
+                             ['url 0', 'url 1', 'url 2', 'url 4'])
+
+    def test_a_failing_thumbnail_stage_does_not_end_the_crawl(self):
+        stderr = StringIO()
+        crawler = Crawler(StringIO(), stderr)
+        crawler.images = {f'{BASE_URL}/image.png': {'news'}}
+        with mock.patch.object(crawler.thumbnails, 'make', side_effect=DatabaseError('locked')):
+            self.assertEqual(crawler.make_thumbnails(), set())
+        self.assertIn('Error making thumbnails: locked', stderr.getvalue())
+        self.assertEqual(crawler.metrics.report()['counters']['errors_total'], [{'stage': 'thumbnail', 'value': 1}])
+
+
+def articles_with_timestamps(section, timestamps):
+    """Store one article of `section` per timestamp; the timestamps are auto_now_add, so they are set afterwards."""
+    model = section.model
+    for number, timestamp in enumerate(timestamps):
+        article = section.build(f'Title {number}', f'{BASE_URL}/news/articles/{number}', None, 'Summary')
+        article.save()
+        model.objects.filter(pk=article.pk).update(**{section.timestamp_field: timestamp})
+    return list(model.objects.order_by(f'-{section.timestamp_field}', '-pk'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.section = SECTIONS['news']
+        start = timezone.now()
+        # Several rows share a timestamp, so the id must break the ties
+        self.rows = articles_with_timestamps(
+            self.section, [start - timedelta(minutes=number // 3) for number in range(20)],
+        )
+        self.factory = RequestFactory()
+
+    def page(self, **params):
+        request = self.factory.get('/news/', {'per_page': 6, **params})
+        return keyset_paginate(request, self.section.model.objects.all(), self.section.timestamp_field)
+
+    def test_walks_every_row_once_newest_first(self):
+        seen, page = [], self.page()
+        self.assertFalse(page.has_previous)
+        while True:
+            seen.extend(page.object_list)
+            if not page.has_next:
+                break
+            page = self.page(after=page.next_cursor)
+        self.assertEqual([row.pk for row in seen], [row.pk for row in self.rows])
+
+    def test_before_cursor_returns_the_previous_page(self):
+        first = self.page()
+        second = self.page(after=first.next_cursor)
+        back = self.page(before=second.previous_cursor)
+        self.assertEqual([row.pk for row in back], [row.pk for row in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_malformed_cursor_falls_back_to_the_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertEqual([row.pk for row in self.page(after='not-a-cursor')], [row.pk for row in self.rows[:6]])
+
+    def test_cursor_round_trip(self):
+        row = self.rows[0]
+        timestamp = getattr(row, self.section.timestamp_field)
+        self.assertEqual(decode_cursor(encode_cursor(timestamp, row.pk)), (timestamp, row.pk))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   ASYNC_VIEWS=False)
+class SectionPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bump_version('news')
+
+    def test_cached_page_is_served_until_the_version_is_bumped(self):
+        self.client.get('/news/')
+        articles_with_timestamps(SECTIONS['news'], [timezone.now()])
+        self.assertNotContains(self.client.get('/news/'), 'Title 0')
+
+        bump_version('news')
+        self.assertContains(self.client.get('/news/'), 'Title 0')
+
+    def test_unknown_query_parameters_share_the_cached_page(self):
+        self.client.get('/news/')
+        articles_with_timestamps(SECTIONS['news'], [timezone.now()])
+        for query in ['?utm_source=x', '?after=junk&per_page=', '?before=&utm=1']:
+            self.assertNotContains(self.client.get(f'/news/{query}'), 'Title 0')
+
+    def test_page_key_only_reads_the_pagination_parameters(self):
+        factory = RequestFactory()
+        cursor = encode_cursor(timezone.now(), 5)
+
+        def key(query):
+            return page_key('news', 1, factory.get(f'/news/{query}'))
+
+        self.assertEqual(key(''), key('?utm_source=x&after=junk'))
+        self.assertEqual(key(f'?after={cursor}'), key(f'?after={cursor}&before={cursor}&utm=1'))
+        self.assertNotEqual(key(f'?after={cursor}'), key(f'?before={cursor}'))
+        self.assertEqual(key('?per_page=1000'), key(f'?per_page={settings.ARTICLES_MAX_PER_PAGE}'))
+        self.assertNotEqual(key(''), key('?per_page=5'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   ASYNC_VIEWS=False)
+class SectionConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bump_version('news')
+
+    def test_etag_answers_304_until_the_section_changes(self):
+        response = self.client.get('/news/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/news/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bump_version('news')
+        response = self.client.get('/news/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_moves_forward_on_a_bump(self):
+        SectionVersion.objects.filter(section='news').update(updated_at=timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get('/news/')['Last-Modified']
+        self.assertEqual(self.client.get('/news/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        bump_version('news')
+        self.assertEqual(self.client.get('/news/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_sections_are_validated_separately(self):
+        etag = self.client.get('/sports/')['ETag']
+        bump_version('news')
+        self.assertEqual(self.client.get('/sports/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   ASYNC_VIEWS=False, REQUEST_PROFILING=True, REQUEST_PROFILING_SAMPLE_RATE=0.0,
+                   REQUEST_PROFILING_SLOW_MS=None)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bump_version('news')
+        articles_with_timestamps(SECTIONS['news'], [timezone.now()])
+
+    def metrics(self, response):
+        """`{name: description}` of the Server-Timing metrics, in order."""
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            description = dict(param.split('=', 1) for param in params).get('desc', '')
+            metrics.setdefault(name, []).append(description.strip('"'))
+        return metrics
+
+    def test_server_timing_names_each_stage_and_template(self):
+        metrics = self.metrics(self.client.get('/news/'))
+        self.assertEqual(list(metrics), ['total', 'view', 'db', 'render', 'tpl'])
+        self.assertCountEqual(metrics['tpl'], [
+            'news.html', 'nave.html', 'footer.html', 'thumbnail.html', 'pagination.html',
+        ])
+        self.assertGreater(int(metrics['db'][0].split()[0]), 0)
+
+    def test_cached_page_renders_no_templates(self):
+        self.client.get('/news/')
+        self.assertEqual(list(self.metrics(self.client.get('/news/'))), ['total', 'view', 'db', 'render'])
+
+    @override_settings(REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('webapp.profiling', 'WARNING') as logs:
+            self.client.get('/news/')
+        self.assertIn('Slow request GET /news/', logs.output[0])
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_no_header_when_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/news/'))
+
+
+class ArticlesApiTests(TestCase):
+    def setUp(self):
+        start = timezone.now()
+        self.rows = articles_with_timestamps(
+            SECTIONS['news'], [start - timedelta(minutes=number) for number in range(5)],
+        )
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        if response.streaming:
+            return response.status_code, json.loads(b''.join(response.streaming_content))
+        return response.status_code, response.json()
+
+    def test_pages_carry_every_field_and_a_cursor_to_the_next(self):
+        status, body = self.get('/api/news/', per_page=2)
+        self.assertEqual(status, 200)
+        self.assertEqual(set(body), {'section', 'results', 'next'})
+        self.assertEqual(body['section'], 'news')
+        self.assertEqual(set(body['results'][0]), set(SECTIONS['news'].public_fields))
+
+        ids = [item['id'] for item in body['results']]
+        while body['next']:
+            status, body = self.get('/api/news/', per_page=2, after=body['next'])
+            ids.extend(item['id'] for item in body['results'])
+        self.assertEqual(ids, [row.pk for row in self.rows])
+
+    def test_fields_and_since(self):
+        since = getattr(self.rows[1], SECTIONS['news'].timestamp_field)
+        _, body = self.get('/api/news/', fields='title,link', since=since.isoformat())
+        self.assertEqual(body['results'], [
+            {'title': row.news_title, 'link': row.news_link} for row in self.rows[:2]
+        ])
+        self.assertIsNone(body['next'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get('/api/nowhere/')[0], 404)
+        for params in [{'after': 'not-a-cursor'}, {'per_page': 'ten'}, {'per_page': '0'}, {'fields': 'title,secret'},
+                       {'since': 'yesterday'}]:
+            with self.subTest(**params):
+                status, body = self.get('/api/news/', **params)
+                self.assertEqual(status, 400)
+                self.assertIn('error', body)
+
+    def test_page_is_streamed_as_it_is_read(self):
+        response = self.client.get('/api/news/', {'per_page': 2})
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 4)  # Head, two articles and the cursor
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ['news', 'latest']:
+            bump_version(name)
+        start = timezone.now()
+        self.rows = articles_with_timestamps(
+            SECTIONS['news'], [start - timedelta(minutes=number) for number in range(3)],
+        )
+        self.factory = AsyncRequestFactory()
+
+    async def test_section_pages_match_the_sync_views(self):
+        for view, aview in [(views.news, views.anews), (views.latest, views.alatest)]:
+            with self.subTest(view=view.__name__):
+                request = RequestFactory().get('/', {'per_page': 2})
+                expected = await sync_to_async(view)(request)
+                await sync_to_async(cache.clear)()
+                response = await aview(self.factory.get('/', {'per_page': 2}))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['ETag'], expected['ETag'])
+                self.assertEqual(aview.__name__, f'a{view.__name__}')
+
+    async def test_unchanged_section_answers_304(self):
+        response = await views.anews(self.factory.get('/news/'))
+        again = await views.anews(self.factory.get('/news/', headers={'If-None-Match': response['ETag']}))
+        self.assertEqual(again.status_code, 304)
+
+    async def test_api_listing_is_streamed(self):
+        response = await api.aarticles(self.factory.get('/api/news/', {'per_page': 2, 'fields': 'id'}), 'news')
+        body = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual([item['id'] for item in body['results']], [row.pk for row in self.rows[:2]])
+        self.assertIsNotNone(body['next'])
+
+        response = await api.aarticles(self.factory.get('/api/news/', {'after': 'bad'}), 'news')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_api_search(self):
+        await FeedEntry.objects.acreate(section='news', title='Election results', link=f'{BASE_URL}/news/1')
+        response = await api.asearch(self.factory.get('/api/search/', {'q': 'election', 'fields': 'title'}))
+        self.assertEqual(json.loads(response.content)['results'], [{'title': 'Election results'}])
+        response = await api.asearch(self.factory.get('/api/search/'))
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   ASYNC_VIEWS=False)
+class LatestFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        start = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            for number, name in enumerate(['news', 'sports', 'news', 'business', 'sports']):
+                section = SECTIONS[name]
+                ArticleWriter(section).write([
+                    section.build(f'Story {number}', f'{BASE_URL}{section.link_prefix}/articles/{number}', None, 'S'),
+                ])
+                # Stored one minute apart, newest last
+                FeedEntry.objects.filter(title=f'Story {number}').update(
+                    published_at=start - timedelta(minutes=5 - number),
+                )
+
+    def test_api_lists_every_section_newest_first(self):
+        body = json.loads(b''.join(self.client.get('/api/latest/').streaming_content))
+        results = body['results']
+        self.assertEqual([item['title'] for item in results], [f'Story {number}' for number in range(4, -1, -1)])
+        self.assertEqual([item['section'] for item in results], ['sports', 'business', 'news', 'sports', 'news'])
+
+        body = json.loads(b''.join(self.client.get('/api/latest/', {'section': 'sports'}).streaming_content))
+        self.assertEqual([item['title'] for item in body['results']], ['Story 4', 'Story 1'])
+        self.assertEqual(self.client.get('/api/latest/', {'section': 'nowhere'}).status_code, 400)
+
+    def test_page_lists_every_section_newest_first(self):
+        content = self.client.get('/latest/').content.decode()
+        positions = [content.index(f'Story {number}') for number in range(4, -1, -1)]
+        self.assertEqual(positions, sorted(positions))
+
+
+class SearchTests(TestCase):
+    def entry(self, title, summary='Summary', section='news'):
+        return FeedEntry.objects.create(section=section, title=title, link=f'{BASE_URL}/{title}', summary=summary)
+
+    def titles(self, text, **options):
+        return [entry.title for entry in search(text, **options)]
+
+    def test_fts5_query_quotes_every_word(self):
+        self.assertEqual(fts5_query('rates AND inflation'), '"rates" "AND" "inflation"')
+        self.assertEqual(fts5_query('title:storm NEAR(a b) -x* "quoted'), (
+            '"title" "storm" "NEAR" "a" "b" "x" "quoted"'
+        ))
+        self.assertEqual(fts5_query('  ^*() '), '')
+
+    def test_query_syntax_is_searched_as_words(self):
+        self.entry('Markets rally as rates fall')
+        for text in ['rates AND', 'NEAR(rates', 'title:rates', '"rates', 'rates*', 'OR rates NOT']:
+            with self.subTest(text=text):
+                self.assertIsInstance(search(text).object_list, list)
+        self.assertEqual(self.titles('rates'), ['Markets rally as rates fall'])
+        self.assertEqual(self.titles('*^('), [])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        entry = self.entry('Storm hits the coast', summary='Villages flooded')
+        self.assertEqual(self.titles('storm'), ['Storm hits the coast'])
+        self.assertEqual(self.titles('villages'), ['Storm hits the coast'])
+
+        entry.title, entry.summary = 'Heatwave grips the city', 'Record temperatures'
+        entry.save()
+        self.assertEqual(self.titles('storm'), [])
+        self.assertEqual(self.titles('villages'), [])
+        self.assertEqual(self.titles('heatwave temperatures'), ['Heatwave grips the city'])
+
+        FeedEntry.objects.filter(pk=entry.pk).update(title='Floods return')
+        self.assertEqual(self.titles('heatwave'), [])
+        self.assertEqual(self.titles('floods'), ['Floods return'])
+
+        entry.delete()
+        self.assertEqual(self.titles('floods'), [])
+
+    def test_title_matches_rank_first_and_sections_filter(self):
+        self.entry('Budget news', summary='The election is near')
+        self.entry('Election results', section='sports')
+        self.assertEqual(self.titles('election'), ['Election results', 'Budget news'])
+        self.assertEqual(self.titles('election', section='news'), ['Budget news'])
+
+    def test_pages(self):
+        for number in range(5):
+            self.entry(f'Election update {number}')
+        first = search('election', per_page=2)
+        self.assertEqual((len(first.object_list), first.has_next, first.has_previous), (2, True, False))
+        last = search('election', page=3, per_page=2)
+        self.assertEqual((len(last.object_list), last.has_next), (1, False))
+        self.assertEqual(search('election', page=10 ** 30, per_page=2).number, MAX_PAGE)
+
+    def test_search_api_and_page(self):
+        self.entry('Election results')
+        body = self.client.get('/api/search/', {'q': 'election', 'fields': 'title,section'}).json()
+        self.assertEqual(body, {'query': 'election', 'results': [{'title': 'Election results', 'section': 'news'}],
+                                'page': 1, 'next': None})
+        for params in [{}, {'q': 'x', 'page': 'two'}, {'q': 'x', 'page': str(10 ** 30)}, {'q': 'x', 'section': 'y'}]:
+            with self.subTest(**params):
+                self.assertEqual(self.client.get('/api/search/', params).status_code, 400)
+        self.assertContains(self.client.get('/search/', {'q': 'election', 'page': str(10 ** 30)}), 'No articles match')
+        self.assertContains(self.client.get('/search/', {'q': 'election* "('}), 'Election results')
@@ -0,0 +1,47 @@
+import os
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from webapp.models import Thumbnail
+
+# Thumbnail files are named by the hash of their content, so a URL never changes meaning
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _thumbnails(urls):
+    return Thumbnail.objects.filter(source_url__in=urls, status='ok').only(
+        'source_url', 'digest', 'widths', 'width', 'height',
+    )
+
+
+def _attach(articles, image_field, thumbnails):
+    by_url = {thumbnail.source_url: thumbnail for thumbnail in thumbnails}
+    for article in articles:
+        article.thumbnail = by_url.get(getattr(article, image_field))
+    return articles
+
+
+def attach_thumbnails(articles, image_field):
+    """Set `thumbnail` on each of `articles` to the `Thumbnail` of its image, or None, in one query."""
+    urls = {getattr(article, image_field) for article in articles} - {None, ''}
+    return _attach(articles, image_field, _thumbnails(urls) if urls else [])
+
+
+async def aattach_thumbnails(articles, image_field):
+    """`attach_thumbnails()` for async views."""
+    urls = {getattr(article, image_field) for article in articles} - {None, ''}
+    return _attach(articles, image_field, [thumbnail async for thumbnail in _thumbnails(urls)] if urls else [])
+
+
+def serve_thumbnail(request, path):
+    """
+    Serve a thumbnail from MEDIA_ROOT/thumbs with a year-long, immutable cache lifetime.
+
+    For deployments without a front-end server for media; one that serves
+    MEDIA_ROOT itself should send the same Cache-Control header for /media/thumbs/.
+    """
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, 'thumbs'))
+    patch_cache_control(response, public=True, max_age=THUMBNAIL_MAX_AGE, immutable=True)
+    return response
@@ -1,13 +1,24 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from . import views
+from . import api, views
+
+
+def pick(module, name):
+    """The async version of a view (`a<name>`) under the ASGI profile, the sync one otherwise."""
+    return getattr(module, f'a{name}' if settings.ASYNC_VIEWS else name)
+
 
 urlpatterns = [
-    path('',views.index,name='index'),
-    path('sports/', views.sports, name='sports'),
-    path('news/', views.news, name='news'),
-    path('business/', views.business, name='business'),
-    path('travel/', views.travel, name='travel'),
-    path('innovation/', views.innovation, name='innovation'),
+    path('',pick(views, 'index'),name='index'),
+    path('sports/', pick(views, 'sports'), name='sports'),
+    path('news/', pick(views, 'news'), name='news'),
+    path('business/', pick(views, 'business'), name='business'),
+    path('travel/', pick(views, 'travel'), name='travel'),
+    path('innovation/', pick(views, 'innovation'), name='innovation'),
+    path('latest/', pick(views, 'latest'), name='latest'),
+    path('search/', views.search, name='search'),
     path('contact/', views.contact, name='contact'),
+    path('api/search/', pick(api, 'search'), name='api_search'),
+    path('api/<str:section>/', pick(api, 'articles'), name='api_articles'),
 ]
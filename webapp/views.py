@@ -5,31 +5,65 @@ from webapp.models import NewsArticle
 from .models import BusinessArticle
 from .models import InnovationArticle
 from .models import TravelArticle
+from .models import FeedEntry
+from .pagination import akeyset_paginate, keyset_paginate, page_size
+from .search import search as search_articles
+from .section_cache import section_page
+from .thumbnails import aattach_thumbnails, attach_thumbnails
+from webapp.crawler.sections import SECTIONS
 
-def index(request):
-    articles = HomeArticle.objects.order_by('-published_at')
-    return render(request, 'index.html', {'articles': articles})
-    
+def list_views(name, section, model, timestamp_field, image_field, template):
+    """
+    `(view, async view)` listing a section's articles newest first, a keyset page at a time.
 
+    The async one is served instead when ASYNC_VIEWS is on (the ASGI profile), so
+    requests run on the event loop instead of taking a worker thread each. It reads
+    the page with the async ORM; rendering needs no further queries, so the two
+    only differ in how the page is read.
+    """
+    def view(request):
+        page = keyset_paginate(request, model.objects.all(), timestamp_field)
+        attach_thumbnails(page.object_list, image_field)
+        return render(request, template, {'articles': page.object_list, 'page': page})
 
-def sports(request):
-    articles = SportsArticle.objects.order_by('-date_created')
-    return render(request, 'sports.html', {'articles': articles})
+    async def aview(request):
+        page = await akeyset_paginate(request, model.objects.all(), timestamp_field)
+        await aattach_thumbnails(page.object_list, image_field)
+        return render(request, template, {'articles': page.object_list, 'page': page})
 
-def news(request):
-    articles = NewsArticle.objects.order_by('-scraped_at')
-    return render(request, 'news.html', {'articles': articles})
+    view.__name__ = view.__qualname__ = name
+    aview.__name__ = aview.__qualname__ = f'a{name}'
+    return section_page(section)(view), section_page(section)(aview)
 
-def business(request):
-    articles = BusinessArticle.objects.order_by('-business_published_at')
-    return render(request, 'business.html', {'articles': articles})
 
-def innovation(request):
-    articles = InnovationArticle.objects.order_by('-business_published_at')
-    return render(request, 'innovation.html', {'articles': articles})
-def travel(request):
-    articles = TravelArticle.objects.order_by('-travel_created_at')
-    return render(request, 'travel.html', {'articles': articles})
+index, aindex = list_views('index', 'home', HomeArticle, 'published_at', 'image_url', 'index.html')
+sports, asports = list_views('sports', 'sports', SportsArticle, 'date_created', 'sports_image_url', 'sports.html')
+news, anews = list_views('news', 'news', NewsArticle, 'scraped_at', 'news_image_url', 'news.html')
+business, abusiness = list_views('business', 'business', BusinessArticle, 'business_published_at',
+                                 'business_image_url', 'business.html')
+innovation, ainnovation = list_views('innovation', 'innovations', InnovationArticle, 'innovation_created_at',
+                                     'innovation_image_url', 'innovation.html')
+travel, atravel = list_views('travel', 'travel', TravelArticle, 'travel_created_at', 'travel_image_url',
+                             'travel.html')
+latest, alatest = list_views('latest', 'latest', FeedEntry, 'published_at', 'image_url', 'latest.html')
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    section = request.GET.get('section') if request.GET.get('section') in SECTIONS else None
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        number = 1
+    page = search_articles(query, section=section, page=number, per_page=page_size(request)) if query else None
+    if page:
+        attach_thumbnails(page.object_list, 'image_url')
+    return render(request, 'search.html', {
+        'query': query,
+        'section': section,
+        'sections': list(SECTIONS),
+        'articles': page.object_list if page else [],
+        'page': page,
+    })
 
 def contact(request):
     return render(request, 'contact.html')
\ No newline at end of file